@@ -13,4 +13,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "books.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from store.events import book_events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == "/book/events/":
+        return await book_events(scope, receive, send)
+    return await django_application(scope, receive, send)
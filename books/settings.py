@@ -30,10 +30,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "store.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "store.middleware.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -46,6 +47,9 @@ AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",
 )
 
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTH_USER_CACHE_TIMEOUT = 300
+
 SOCIAL_AUTH_JSONFIELD_ENABLED = True
 SOCIAL_AUTH_GITHUB_KEY = env("SOCIAL_AUTH_GITHUB_KEY")
 SOCIAL_AUTH_GITHUB_SECRET = env("SOCIAL_AUTH_GITHUB_SECRET")
@@ -84,6 +88,15 @@ DATABASES = {
     }
 }
 
+# Shared by every worker: the book detail versions, the sessions and the
+# cached users must be invalidated everywhere at once.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": env("MEMCACHED_LOCATION", default="127.0.0.1:11211"),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -110,13 +123,40 @@ USE_TZ = True
 REST_FRAMEWORK = {
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
+        "store.parsers.MessagePackParser",
+        "store.parsers.CBORParser",
     ],
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.BrowsableAPIRenderer",
         "rest_framework.renderers.JSONRenderer",
+        "store.renderers.MessagePackRenderer",
+        "store.renderers.CBORRenderer",
     ],
 }
 
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5
+
+BOOK_CACHE_LOCAL_MAX_ENTRIES = 1000
+BOOK_CACHE_LOCAL_TTL = 60
+BOOK_CACHE_MAX_STALENESS = 1
+BOOK_CACHE_TIMEOUT = 300
+
+BOOK_EVENTS_BACKEND = "store.events.LocalBackend"
+BOOK_EVENTS_INTERVAL = 1.0
+BOOK_EVENTS_KEEPALIVE = 15
+
+QUERY_BUDGETS_ENABLED = DEBUG
+
+BOOK_AUTOCOMPLETE_REFRESH_INTERVAL = 1
+BOOK_AUTOCOMPLETE_MAX_AGE = 300
+
+# Rebuilt by the build_catalog_snapshot command, which should be scheduled
+# more often than the snapshots expire.
+CATALOG_SNAPSHOT_ROOT = BASE_DIR / "snapshots"
+CATALOG_SNAPSHOT_MAX_AGE = 300
+CATALOG_SNAPSHOT_ACCEL_PREFIX = env("CATALOG_SNAPSHOT_ACCEL_PREFIX", default=None)
+
 STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
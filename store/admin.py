@@ -1,13 +1,26 @@
 from django.contrib import admin
 
 from .models import Book, UserBookRelation
+from .paginators import EstimatedCountPaginator
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    pass
+    list_display = ("id", "name", "author_name", "price", "rating", "owner")
+    list_select_related = ("owner",)
+    raw_id_fields = ("owner",)
+    search_fields = ("^name", "^author_name")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(UserBookRelation)
 class UserBookRelationAdmin(admin.ModelAdmin):
-    pass
+    list_display = ("id", "__str__", "like", "in_bookmarks", "rating")
+    list_select_related = ("user", "book")
+    list_filter = ("like", "in_bookmarks", "rating")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("book",)
+    search_fields = ("user__username__exact", "^book__name")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,131 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    _get_user_session_key,
+    get_user_model,
+    load_backend,
+)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import router
+from django.utils.crypto import constant_time_compare
+
+USER_SNAPSHOT_FIELDS = ("id", "username", "is_staff", "is_active", "is_superuser")
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def user_version_key(user_id):
+    return f"auth-user:{user_id}:version"
+
+
+def make_user_snapshot(user):
+    """
+    Returns the slim, cacheable representation of a user.
+
+    Args:
+        user: The user to snapshot.
+
+    Returns:
+        dict: The snapshot fields and the session auth hash of the user.
+    """
+    snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+    snapshot["session_auth_hash"] = user.get_session_auth_hash()
+    return snapshot
+
+
+def user_from_snapshot(snapshot):
+    """
+    Builds a user instance from a snapshot.
+
+    The other fields are deferred: reading one loads it from the database and
+    saving the instance only writes the snapshot fields.
+
+    Args:
+        snapshot: The cached snapshot of the user.
+
+    Returns:
+        User: The user instance.
+    """
+    User = get_user_model()
+    # from_db() expects the values in the order of the model's fields.
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in USER_SNAPSHOT_FIELDS
+    ]
+    return User.from_db(
+        router.db_for_read(User),
+        field_names,
+        [snapshot[field] for field in field_names],
+    )
+
+
+def get_cached_user(request):
+    """
+    Returns the user of the request session, read from the cache when possible.
+
+    Mirrors ``django.contrib.auth.get_user``: the session must reference a
+    configured backend and carry the current session auth hash of the user,
+    otherwise the session is flushed and an anonymous user is returned.
+
+    Args:
+        request: The request with a loaded session.
+
+    Returns:
+        User | AnonymousUser: The user of the request.
+    """
+    try:
+        user_id = _get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    key, version_key = user_cache_key(user_id), user_version_key(user_id)
+    cached = cache.get_many([key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        # Initialized from the clock so it never matches older snapshots.
+        cache.add(version_key, time.time_ns(), None)
+        version = cache.get(version_key)
+    snapshot = cached.get(key)
+    if snapshot is None or snapshot["version"] != version:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        # Stored under the version read before loading the user: if the user
+        # changes meanwhile, the version moves on and this snapshot is ignored.
+        snapshot = {**make_user_snapshot(user), "version": version}
+        cache.set(key, snapshot, settings.AUTH_USER_CACHE_TIMEOUT)
+    if not snapshot["is_active"]:
+        return AnonymousUser()
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (
+        session_hash
+        and constant_time_compare(session_hash, snapshot["session_auth_hash"])
+    ):
+        request.session.flush()
+        return AnonymousUser()
+    return user_from_snapshot(snapshot)
+
+
+def invalidate_cached_user(user_id):
+    """
+    Bumps the snapshot version of a user so every cached snapshot is ignored.
+
+    Args:
+        user_id: The id of the user.
+    """
+    key = user_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,292 @@
+import heapq
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+
+from store.models import Book
+
+
+def normalize(text):
+    """
+    Normalizes text for prefix matching: accents removed, case folded and
+    whitespace collapsed.
+
+    Args:
+        text: The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def index_keys(name, author_name):
+    """
+    Returns the index keys of a book: every word suffix of its title and author.
+
+    Args:
+        name: The title of the book.
+        author_name: The author of the book.
+
+    Returns:
+        set[str]: The keys the book is found under.
+    """
+    keys = set()
+    for text in (normalize(name), normalize(author_name)):
+        words = text.split(" ")
+        keys.update(" ".join(words[i:]) for i in range(len(words)) if words[i])
+    return keys
+
+
+class AutocompleteIndex:
+    """
+    An in-process prefix index of book titles and authors.
+
+    Keys are kept in a sorted list with a parallel array of book ids, so the
+    matches of a prefix are found by two binary searches. Every match is
+    ranked, and the best ranked ids of recently searched prefixes are cached
+    until one of their books changes. The index is built from the database on
+    first use, books changed in this process are refreshed in one query at
+    the next lookup (at most once per ``refresh_interval`` seconds) and the
+    whole index is rebuilt in a background thread after ``max_age`` seconds
+    to pick up changes made by other processes.
+
+    Attributes:
+        refresh_interval (float): Minimum seconds between refreshes.
+        max_age (float): Seconds after which the index is rebuilt.
+        max_cached_prefixes (int): Maximum prefixes whose ranking is cached.
+    """
+
+    def __init__(self, refresh_interval, max_age, max_cached_prefixes=10000):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.max_cached_prefixes = max_cached_prefixes
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._generation = 0
+        self._keys = []
+        self._ids = array("q")
+        self._books = {}
+        self._ranked = OrderedDict()
+        self._dirty = set()
+        self._built_at = None
+        self._refreshed_at = 0.0
+
+    def build(self):
+        """
+        Rebuilds the whole index from the database.
+        """
+        with self._lock:
+            # Books changed from now on may be missed by the query below.
+            self._dirty.clear()
+        books = {
+            book_id: (name, author_name, likes, rating)
+            for book_id, name, author_name, likes, rating in Book.objects.values_list(
+                "id", "name", "author_name", "likes_count", "rating"
+            ).iterator()
+        }
+        entries = sorted(
+            (key, book_id)
+            for book_id, (name, author_name, _, _) in books.items()
+            for key in index_keys(name, author_name)
+        )
+        with self._lock:
+            self._keys = [key for key, _ in entries]
+            self._ids = array("q", (book_id for _, book_id in entries))
+            self._books = books
+            self._ranked.clear()
+            self._generation += 1
+            self._built_at = time.monotonic()
+
+    def rebuild_in_background(self):
+        """
+        Rebuilds the index in a background thread unless a rebuild is running.
+        """
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        finally:
+            with self._lock:
+                self._building = False
+            connection.close()
+
+    def ensure_fresh(self):
+        """
+        Builds the index on first use, then keeps it up to date.
+        """
+        now = time.monotonic()
+        if self._built_at is None:
+            # Only one request builds the index, the others wait for it.
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build()
+        elif now - self._built_at > self.max_age:
+            self.rebuild_in_background()
+        elif self._dirty and now - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+    def mark_dirty(self, book_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._dirty.add(book_id)
+
+    def remove(self, book_id):
+        with self._lock:
+            self._dirty.discard(book_id)
+            self._remove(book_id)
+
+    def _forget_rankings(self, key):
+        for length in range(1, len(key) + 1):
+            self._ranked.pop(key[:length], None)
+
+    def _remove(self, book_id):
+        book = self._books.pop(book_id, None)
+        if book is None:
+            return
+        self._generation += 1
+        for key in index_keys(book[0], book[1]):
+            self._forget_rankings(key)
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == book_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+
+    def _add(self, book_id, book):
+        self._books[book_id] = book
+        self._generation += 1
+        for key in index_keys(book[0], book[1]):
+            self._forget_rankings(key)
+            position = bisect_left(self._keys, key)
+            while (
+                position < len(self._keys)
+                and self._keys[position] == key
+                and self._ids[position] < book_id
+            ):
+                position += 1
+            self._keys.insert(position, key)
+            self._ids.insert(position, book_id)
+
+    def refresh(self):
+        """
+        Reloads the books changed since the previous refresh with one query.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._refreshed_at = time.monotonic()
+        if not dirty:
+            return
+        books = Book.objects.filter(id__in=dirty).values_list(
+            "id", "name", "author_name", "likes_count", "rating"
+        )
+        with self._lock:
+            for book_id, *book in books:
+                self._remove(book_id)
+                self._add(book_id, tuple(book))
+
+    def rank(self, prefix, limit):
+        """
+        Returns the ids of the best ranked books matching a normalized prefix.
+
+        Args:
+            prefix: The normalized prefix.
+            limit: The maximum number of ids returned.
+
+        Returns:
+            list[int]: The ids, best ranked first.
+        """
+        with self._lock:
+            cached = self._ranked.get(prefix)
+            if cached is not None and (
+                cached[0] >= limit or len(cached[1]) < cached[0]
+            ):
+                self._ranked.move_to_end(prefix)
+                return cached[1][:limit]
+            generation = self._generation
+            start = bisect_left(self._keys, prefix)
+            stop = bisect_left(self._keys, prefix + "\U0010ffff")
+            matches = set(self._ids[start:stop])
+            books = self._books
+
+        candidates = ((book_id, books.get(book_id)) for book_id in matches)
+        ranked = [
+            book_id
+            for book_id, _ in heapq.nlargest(
+                limit,
+                ((book_id, book) for book_id, book in candidates if book is not None),
+                key=lambda item: (item[1][2], item[1][3] or 0, -item[0]),
+            )
+        ]
+        with self._lock:
+            # A ranking computed while books changed may already be stale.
+            if generation == self._generation:
+                self._ranked[prefix] = (limit, ranked)
+                if len(self._ranked) > self.max_cached_prefixes:
+                    self._ranked.popitem(last=False)
+        return ranked
+
+    def search(self, query, limit):
+        """
+        Returns the most liked and best rated books matching a prefix.
+
+        Args:
+            query: The prefix typed by the user.
+            limit: The maximum number of books returned.
+
+        Returns:
+            list[dict]: The matching books, best ranked first.
+        """
+        self.ensure_fresh()
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        books = self._books
+        results = []
+        for book_id in self.rank(prefix, limit):
+            book = books.get(book_id)
+            if book is None:
+                continue
+            name, author_name, likes, rating = book
+            results.append(
+                {
+                    "id": book_id,
+                    "name": name,
+                    "author_name": author_name,
+                    "likes": likes,
+                    "rating": None if rating is None else str(rating),
+                }
+            )
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._ids = array("q")
+            self._books = {}
+            self._ranked.clear()
+            self._dirty.clear()
+            self._generation += 1
+            self._built_at = None
+
+
+autocomplete_index = AutocompleteIndex(
+    refresh_interval=getattr(settings, "BOOK_AUTOCOMPLETE_REFRESH_INTERVAL", 1),
+    max_age=getattr(settings, "BOOK_AUTOCOMPLETE_MAX_AGE", 300),
+)
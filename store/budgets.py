@@ -0,0 +1,96 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudget:
+    """
+    The maximum number of queries and SQL time a viewset action may use.
+
+    Attributes:
+        queries (int): The maximum number of queries.
+        time_ms (float | None): The maximum total SQL time in milliseconds.
+    """
+
+    def __init__(self, queries, time_ms=None):
+        self.queries = queries
+        self.time_ms = time_ms
+
+    def __repr__(self):
+        return f"QueryBudget(queries={self.queries}, time_ms={self.time_ms})"
+
+    def violations(self, counter):
+        """
+        Returns the limits a measured request went over.
+
+        Args:
+            counter: The query counter of the request.
+
+        Returns:
+            list[str]: A description of every exceeded limit.
+        """
+        violations = []
+        if counter.count > self.queries:
+            violations.append(f"{counter.count} queries > {self.queries}")
+        if self.time_ms is not None and counter.time_ms > self.time_ms:
+            violations.append(f"{counter.time_ms:.1f} ms > {self.time_ms} ms")
+        return violations
+
+
+class QueryCounter:
+    """
+    A database execute wrapper counting queries and their total time.
+
+    Attributes:
+        count (int): The number of executed queries.
+        time_ms (float): The total execution time in milliseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time_ms += (time.perf_counter() - started) * 1000
+
+
+class QueryBudgetMixin:
+    """
+    A viewset mixin logging a warning when an action exceeds its query budget.
+
+    Budgets are declared per action in ``query_budgets`` and checked when
+    ``QUERY_BUDGETS_ENABLED`` is set, which defaults to ``DEBUG``.
+
+    Attributes:
+        query_budgets (dict): Maps action names to their QueryBudget.
+    """
+
+    query_budgets = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, "QUERY_BUDGETS_ENABLED", settings.DEBUG):
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+        budget = self.query_budgets.get(getattr(self, "action", None))
+        if budget is not None:
+            violations = budget.violations(counter)
+            if violations:
+                logger.warning(
+                    "%s.%s exceeded its query budget: %s",
+                    type(self).__name__,
+                    self.action,
+                    ", ".join(violations),
+                )
+        return response
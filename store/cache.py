@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class LocalCache:
+    """
+    A thread-safe in-process LRU cache with a bounded size and entry TTL.
+
+    Attributes:
+        max_entries (int): The maximum number of entries kept.
+        ttl (float): The number of seconds an entry stays valid.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, version):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = {
+                "value": value,
+                "version": version,
+                "checked_at": now,
+                "expires_at": now + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class BookDetailCache:
+    """
+    A two-tier cache of serialized book details.
+
+    Entries are looked up in a per-process LRU first and in the shared Django
+    cache second. Every book has a version number in the shared cache that is
+    bumped on invalidation; a local entry is revalidated against it once it is
+    older than ``max_staleness`` seconds, which bounds how long another worker
+    can serve a stale representation.
+
+    Attributes:
+        local (LocalCache): The in-process tier.
+        max_staleness (float): Seconds a local entry is served unchecked.
+        timeout (int): Seconds a representation is kept in the shared cache.
+        stats (dict): Hit and miss counters of this process.
+    """
+
+    key_prefix = "book-detail"
+
+    def __init__(self, max_entries, ttl, max_staleness, timeout):
+        self.local = LocalCache(max_entries, ttl)
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    def version_key(self, book_id):
+        return f"{self.key_prefix}:{book_id}:version"
+
+    def data_key(self, book_id, version):
+        return f"{self.key_prefix}:{book_id}:{version}"
+
+    def get_version(self, book_id):
+        """
+        Returns the current version of a book, initializing it if missing.
+
+        A missing version is initialized from the clock so it never matches
+        representations stored before the shared cache evicted it.
+
+        Args:
+            book_id: The id of the book.
+
+        Returns:
+            int: The current version.
+        """
+        key = self.version_key(book_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+
+    def get(self, book_id):
+        """
+        Returns the cached representation of a book.
+
+        Args:
+            book_id: The id of the book.
+
+        Returns:
+            tuple: The representation or None, and the version to store a
+                freshly rendered representation under.
+        """
+        book_id = int(book_id)
+        entry = self.local.get(book_id)
+        if entry and time.monotonic() - entry["checked_at"] < self.max_staleness:
+            self.stats["local_hits"] += 1
+            return entry["value"], entry["version"]
+
+        version = self.get_version(book_id)
+        if entry and entry["version"] == version:
+            entry["checked_at"] = time.monotonic()
+            self.stats["local_hits"] += 1
+            return entry["value"], version
+
+        value = cache.get(self.data_key(book_id, version))
+        if value is None:
+            self.stats["misses"] += 1
+            return None, version
+        self.stats["shared_hits"] += 1
+        self.local.set(book_id, value, version)
+        return value, version
+
+    def set(self, book_id, value, version):
+        """
+        Stores the representation of a book rendered at a version.
+
+        Args:
+            book_id: The id of the book.
+            value: The serialized representation.
+            version: The version returned by ``get`` before rendering.
+        """
+        book_id = int(book_id)
+        cache.set(self.data_key(book_id, version), value, self.timeout)
+        self.local.set(book_id, value, version)
+
+    def invalidate(self, book_id):
+        """
+        Bumps the version of a book so every tier drops its representation.
+
+        Args:
+            book_id: The id of the book.
+        """
+        key = self.version_key(book_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+        self.local.delete(int(book_id))
+
+    def clear(self):
+        self.local.clear()
+        for counter in self.stats:
+            self.stats[counter] = 0
+
+
+book_detail_cache = BookDetailCache(
+    max_entries=getattr(settings, "BOOK_CACHE_LOCAL_MAX_ENTRIES", 1000),
+    ttl=getattr(settings, "BOOK_CACHE_LOCAL_TTL", 60),
+    max_staleness=getattr(settings, "BOOK_CACHE_MAX_STALENESS", 1),
+    timeout=getattr(settings, "BOOK_CACHE_TIMEOUT", 300),
+)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warns when the default cache isn't shared by the worker processes.
+
+    The book detail versions, the cached sessions and the cached users are
+    invalidated through the default cache, so with a per-process cache other
+    workers keep serving stale entries until they expire.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache {backend} is not shared between processes.",
+            hint="Configure a shared cache such as memcached in CACHES.",
+            id="store.W001",
+        )
+    ]
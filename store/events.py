@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from store.models import Book
+
+
+class BaseBackend:
+    """
+    The change feed a broadcaster reads changed book ids from.
+
+    ``publish`` is called from request threads after a relation change is
+    committed, ``drain`` from the broadcaster once per interval. A shared
+    backend lets every ASGI worker see writes made by any other process.
+
+    Attributes:
+        shared (bool): Whether changes published here reach other processes.
+    """
+
+    shared = True
+
+    def publish(self, book_id):
+        raise NotImplementedError
+
+    async def drain(self):
+        raise NotImplementedError
+
+
+class LocalBackend(BaseBackend):
+    """
+    An in-process change feed that only sees writes of its own process.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def publish(self, book_id):
+        with self._lock:
+            self._pending.add(book_id)
+
+    async def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+
+class Broadcaster:
+    """
+    Fans out coalesced like and rating changes to server-sent event listeners.
+
+    Changed book ids are collected by the backend and flushed once per
+    ``interval``: every book changed during the interval produces at most one
+    event, and the current counters of all of them are read with one query
+    shared by every listener.
+
+    Attributes:
+        backend (BaseBackend): The change feed.
+        interval (float): Seconds between flushes.
+        queue_size (int): Events buffered per listener before dropping the oldest.
+    """
+
+    def __init__(self, backend, interval, queue_size=100):
+        self.backend = backend
+        self.interval = interval
+        self.queue_size = queue_size
+        self.listeners = set()
+        self._task = None
+
+    def publish(self, book_id):
+        if self.backend.shared or self.listeners:
+            self.backend.publish(book_id)
+
+    def subscribe(self):
+        """
+        Registers a listener and starts the flush loop if it isn't running.
+
+        Returns:
+            asyncio.Queue: The queue the listener receives events from.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.listeners.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.listeners.discard(queue)
+
+    async def run(self):
+        while self.listeners:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        """
+        Sends one event per book changed since the previous flush.
+        """
+        book_ids = await self.backend.drain()
+        if not book_ids or not self.listeners:
+            return
+        events = await sync_to_async(self.load_events)(book_ids)
+        for queue in list(self.listeners):
+            for event in events:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    def load_events(self, book_ids):
+        books = Book.objects.filter(id__in=book_ids).values_list(
+            "id", "likes_count", "rating"
+        )
+        return [
+            {
+                "book": book_id,
+                "likes": likes,
+                "rating": None if rating is None else str(rating),
+            }
+            for book_id, likes, rating in books
+        ]
+
+
+async def book_events(scope, receive, send):
+    """
+    An ASGI application streaming book changes as server-sent events.
+
+    Args:
+        scope: The ASGI connection scope.
+        receive: The ASGI receive callable.
+        send: The ASGI send callable.
+    """
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    queue = broadcaster.subscribe()
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnected},
+                timeout=settings.BOOK_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_event in done:
+                body = f"event: book\ndata: {json.dumps(next_event.result())}\n\n"
+            else:
+                next_event.cancel()
+                body = ": keepalive\n\n"
+            if not disconnected.done():
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": body.encode(),
+                        "more_body": True,
+                    }
+                )
+    finally:
+        broadcaster.unsubscribe(queue)
+        disconnected.cancel()
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+broadcaster = Broadcaster(
+    backend=import_string(settings.BOOK_EVENTS_BACKEND)(),
+    interval=settings.BOOK_EVENTS_INTERVAL,
+)
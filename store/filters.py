@@ -0,0 +1,39 @@
+from django.db.models import F
+from rest_framework import filters
+
+
+class BookOrderingFilter(filters.OrderingFilter):
+    """
+    An ordering filter that sorts books by persisted, indexed columns.
+
+    ``likes`` orders by the maintained ``likes_count`` column, unrated books
+    come last when ordering by rating in either direction, and ``id`` breaks
+    ties in the direction of the last ordering term.
+
+    Attributes:
+        aliases (dict): Maps public ordering names to model fields.
+    """
+
+    aliases = {"likes": "likes_count"}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+
+        terms = []
+        for term in ordering:
+            descending = term.startswith("-")
+            name = term.lstrip("-")
+            name = self.aliases.get(name, name)
+            if name == "rating":
+                terms.append(
+                    F(name).desc(nulls_last=True)
+                    if descending
+                    else F(name).asc(nulls_last=True)
+                )
+            else:
+                terms.append(f"-{name}" if descending else name)
+        if "id" not in (term.lstrip("-") for term in ordering):
+            terms.append("-id" if descending else "id")
+        return terms
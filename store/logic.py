@@ -1,6 +1,28 @@
-from django.db.models import Avg
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    BigIntegerField,
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
 
-from store.models import UserBookRelation
+from django.utils import timezone
+
+from store.models import (
+    Book,
+    BookActivity,
+    BookTombstone,
+    ChangeCounter,
+    UserBookRelation,
+)
 
 
 def set_rating(book):
@@ -16,4 +38,221 @@ def set_rating(book):
         .get("rating")
     )
     book.rating = rating
-    book.save()
+    book.save(update_fields=["rating"])
+
+
+def next_change_version(count=1):
+    """
+    Issues the next book change version, or the last of a block of versions.
+
+    The counter row stays locked until the surrounding transaction commits,
+    so versions become visible to readers in the order they were issued.
+    This serializes every versioned write on the row lock: call it as late
+    as possible in a transaction to keep the lock short.
+
+    Args:
+        count: The number of consecutive versions to issue.
+
+    Returns:
+        int: The last issued change version.
+    """
+    # UPDATE ... RETURNING issues the version in a single statement.
+    table = connection.ops.quote_name(ChangeCounter._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET value = value + %s WHERE id = 1 RETURNING value",
+            [count],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        ChangeCounter.objects.create(pk=1, value=count)
+        return count
+    return row[0]
+
+
+def average_rating():
+    """
+    Returns a subquery computing the average relation rating of a book.
+
+    Returns:
+        Subquery: The average rating of the book in the outer query.
+    """
+    return Subquery(
+        UserBookRelation.objects.filter(book=OuterRef("pk"))
+        .values("book")
+        .annotate(rating=Avg("rating"))
+        .values("rating")
+    )
+
+
+def relation_count(**filters):
+    """
+    Returns a subquery counting the relations of a book matching filters.
+
+    Args:
+        **filters: The lookups the counted relations must match.
+
+    Returns:
+        Coalesce: The number of matching relations of the book in the outer query.
+    """
+    return Coalesce(
+        Subquery(
+            UserBookRelation.objects.filter(book=OuterRef("pk"), **filters)
+            .values("book")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def update_book_aggregates(book_id, likes_delta=0, old_rating=None, new_rating=None):
+    """
+    Applies a relation change to the persisted aggregates of a book.
+
+    The counters are updated in place so concurrent relation writes never
+    overwrite each other, the average rating is derived from the updated
+    rating counters in the same statement, and the book change version is
+    always bumped.
+
+    Args:
+        book_id: The id of the book.
+        likes_delta: The change of the number of likes.
+        old_rating: The rating of the relation before the change.
+        new_rating: The rating of the relation after the change.
+    """
+    with transaction.atomic(savepoint=False):
+        fields = {"change_version": next_change_version()}
+        if likes_delta:
+            fields["likes_count"] = F("likes_count") + likes_delta
+        if old_rating != new_rating:
+            counts = {}
+            for value, _ in UserBookRelation.RATE_CHOICES:
+                delta = (value == new_rating) - (value == old_rating)
+                counts[value] = F(f"rating_{value}_count") + delta
+                if delta:
+                    fields[f"rating_{value}_count"] = counts[value]
+            total = sum(counts.values(), Value(0))
+            weighted = sum((value * count for value, count in counts.items()), Value(0))
+            fields["rating"] = ExpressionWrapper(
+                Cast(weighted, FloatField()) / NullIf(total, 0),
+                output_field=FloatField(),
+            )
+        Book.objects.filter(pk=book_id).update(**fields)
+
+
+def activity_bucket(period, moment=None):
+    """
+    Returns the start of the hour or day bucket a moment falls in.
+
+    Args:
+        period: Either BookActivity.HOUR or BookActivity.DAY.
+        moment: The moment to bucket, now by default.
+
+    Returns:
+        datetime: The start of the bucket.
+    """
+    moment = moment or timezone.now()
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if period == BookActivity.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def record_activity(book_id, likes_delta=0, bookmarks_delta=0, rated=False):
+    """
+    Adds a relation change to the current hourly and daily activity rollups.
+
+    Both rollups are created or incremented by a single upsert statement.
+
+    Args:
+        book_id: The id of the book.
+        likes_delta: The change of the number of likes.
+        bookmarks_delta: The change of the number of bookmarks.
+        rated: Whether a rating was set or changed.
+    """
+    now = timezone.now()
+    params = []
+    for period, _ in BookActivity.PERIOD_CHOICES:
+        bucket = connection.ops.adapt_datetimefield_value(activity_bucket(period, now))
+        params += [book_id, period, bucket, likes_delta, bookmarks_delta, int(rated)]
+    table = connection.ops.quote_name(BookActivity._meta.db_table)
+    rows = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(BookActivity.PERIOD_CHOICES))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (book_id, period, bucket, likes, bookmarks, ratings) "
+            f"VALUES {rows} ON CONFLICT (book_id, period, bucket) DO UPDATE SET "
+            f"likes = {table}.likes + excluded.likes, "
+            f"bookmarks = {table}.bookmarks + excluded.bookmarks, "
+            f"ratings = {table}.ratings + excluded.ratings",
+            params,
+        )
+
+
+def recompute_book_aggregates(book_ids, batch_size=300):
+    """
+    Recomputes the rating and likes of many books, a batch of books per statement.
+
+    Every updated book receives its own change version from a block issued
+    for its batch, so delta sync cursors never split a version.
+
+    Args:
+        book_ids: The ids of the books to recompute.
+        batch_size: The number of books updated per statement.
+    """
+    book_ids = sorted(set(book_ids))
+    for start in range(0, len(book_ids), batch_size):
+        batch = book_ids[start : start + batch_size]
+        with transaction.atomic(savepoint=False):
+            last_version = next_change_version(len(batch))
+            versions = enumerate(batch, start=last_version - len(batch) + 1)
+            Book.objects.filter(id__in=batch).update(
+                rating=average_rating(),
+                likes_count=relation_count(like=True),
+                **{
+                    f"rating_{value}_count": relation_count(rating=value)
+                    for value, _ in UserBookRelation.RATE_CHOICES
+                },
+                change_version=Case(
+                    *(
+                        When(id=book_id, then=Value(version))
+                        for version, book_id in versions
+                    ),
+                    output_field=BigIntegerField(),
+                ),
+            )
+
+
+def get_changes(since, limit):
+    """
+    Returns the books changed and deleted after a change version.
+
+    Args:
+        since: The change version the client has already synced.
+        limit: The maximum number of changes to return.
+
+    Returns:
+        dict: The changed and deleted book ids, the new cursor and whether
+            more changes are pending.
+    """
+    changed = (
+        Book.objects.filter(change_version__gt=since)
+        .order_by("change_version")
+        .values_list("change_version", "id")[: limit + 1]
+    )
+    deleted = (
+        BookTombstone.objects.filter(change_version__gt=since)
+        .order_by("change_version")
+        .values_list("change_version", "book_id")[: limit + 1]
+    )
+    changes = sorted(
+        [(version, "changed", pk) for version, pk in changed]
+        + [(version, "deleted", pk) for version, pk in deleted]
+    )
+    batch = changes[:limit]
+    return {
+        "changed": [pk for _, kind, pk in batch if kind == "changed"],
+        "deleted": [pk for _, kind, pk in batch if kind == "deleted"],
+        "cursor": batch[-1][0] if batch else since,
+        "has_more": len(changes) > limit,
+    }
@@ -0,0 +1,55 @@
+import json
+import timeit
+
+import cbor2
+import msgpack
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from store.middleware import CompressionMiddleware
+from store.renderers import CBORRenderer, MessagePackRenderer
+from store.serializers import BookSerializer
+from store.views import BookViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures payload size and encode/decode time of the book list "
+        "in every supported response format."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        books = BookViewSet.queryset.all()[: options["books"]]
+        data = BookSerializer(books, many=True).data
+        formats = (
+            ("json", JSONRenderer(), json.loads),
+            ("msgpack", MessagePackRenderer(), msgpack.unpackb),
+            ("cbor", CBORRenderer(), cbor2.loads),
+        )
+        repeat = options["repeat"]
+        # Sizes are measured exactly as the served responses are compressed.
+        compression = CompressionMiddleware(get_response=None)
+
+        self.stdout.write(
+            f"{len(data)} books, best of {repeat} runs\n"
+            f"{'format':<10}{'bytes':>10}{'gzip':>10}{'br':>10}"
+            f"{'encode ms':>12}{'decode ms':>12}"
+        )
+        for name, renderer, decode in formats:
+            content = renderer.render(data)
+            encode_time = min(
+                timeit.repeat(lambda: renderer.render(data), number=1, repeat=repeat)
+            )
+            decode_time = min(
+                timeit.repeat(lambda: decode(content), number=1, repeat=repeat)
+            )
+            self.stdout.write(
+                f"{name:<10}{len(content):>10}"
+                f"{len(compression.compress(content, 'gzip')):>10}"
+                f"{len(compression.compress(content, 'br')):>10}"
+                f"{encode_time * 1000:>12.3f}{decode_time * 1000:>12.3f}"
+            )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.snapshots import build_snapshot
+from store.views import BookViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the book list and book details to a new static snapshot "
+        "served to anonymous clients. Snapshots are served for "
+        "CATALOG_SNAPSHOT_MAX_AGE seconds, so schedule this command (e.g. "
+        "from cron) more often than that."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=2,
+            help="How many snapshot versions are kept on disk.",
+        )
+
+    def handle(self, *args, **options):
+        if options["keep"] < 1:
+            raise CommandError("--keep must be at least 1.")
+        version, count = build_snapshot(
+            BookViewSet.queryset, options["chunk_size"], options["keep"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered {count} books to snapshot {version}.")
+        )
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from store.logic import activity_bucket
+from store.models import BookActivity
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes hourly activity rollups older than the retention period; "
+        "daily rollups are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hourly-retention-days",
+            type=int,
+            default=7,
+            help="How many days of hourly rollups are kept.",
+        )
+
+    def handle(self, *args, **options):
+        before = activity_bucket(BookActivity.DAY) - timedelta(
+            days=options["hourly_retention_days"]
+        )
+        deleted, _ = BookActivity.objects.filter(
+            period=BookActivity.HOUR, bucket__lt=before
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} hourly rollups before {before}.")
+        )
@@ -0,0 +1,63 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from store.models import SimilarBook, UserBookRelation
+from store.recommendations import build_like_matrix, top_k_similar
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the "readers who liked this also liked" table from '
+        "user likes and ratings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=10)
+        parser.add_argument(
+            "--min-rating",
+            type=int,
+            default=4,
+            help="Ratings at or above this value count as a like.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1024)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        interactions = np.fromiter(
+            UserBookRelation.objects.filter(
+                Q(like=True) | Q(rating__gte=options["min_rating"])
+            )
+            .values_list("user_id", "book_id")
+            .iterator(),
+            dtype=np.dtype((np.int64, 2)),
+        )
+        if not len(interactions):
+            SimilarBook.objects.all().delete()
+            self.stdout.write("No likes found, similar books cleared.")
+            return
+
+        matrix, book_ids = build_like_matrix(interactions[:, 0], interactions[:, 1])
+        with transaction.atomic():
+            SimilarBook.objects.all().delete()
+            created = 0
+            for sources, columns, scores in top_k_similar(
+                matrix, options["top_k"], options["chunk_size"]
+            ):
+                pairs = [
+                    SimilarBook(book_id=book, similar_book_id=similar, score=score)
+                    for book, similar, score in zip(
+                        book_ids[sources].tolist(),
+                        book_ids[columns].tolist(),
+                        scores.tolist(),
+                    )
+                ]
+                SimilarBook.objects.bulk_create(pairs, batch_size=options["batch_size"])
+                created += len(pairs)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {created} similar book pairs for {len(book_ids)} books."
+            )
+        )
@@ -0,0 +1,292 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from store.logic import next_change_version, recompute_book_aggregates
+from store.models import Book, ImportProgress, UserBookRelation
+
+BOOK_FIELDS = ("id", "name", "price", "author_name", "owner")
+RELATION_FIELDS = ("user", "book", "like", "in_bookmarks", "rating")
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams books or user book relations from a CSV or JSON Lines file "
+        "into the database in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--type", choices=("books", "relations"), default="books", dest="kind"
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="The input format, inferred from the file extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Insert with PostgreSQL COPY instead of bulk_create.",
+        )
+        parser.add_argument(
+            "--progress-key",
+            help="Identifies the recorded progress, the absolute input path by default.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the rows committed by a previous run.",
+        )
+
+    def handle(self, *args, **options):
+        self.kind = options["kind"]
+        self.users = {}
+        self.use_copy = options["copy"]
+        if self.use_copy and connection.vendor != "postgresql":
+            raise CommandError("--copy is only supported on PostgreSQL.")
+
+        path = options["path"]
+        input_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "jsonl"
+        )
+        progress_key = options["progress_key"] or os.path.abspath(path)
+        done = self.read_progress(progress_key) if options["resume"] else 0
+
+        imported = invalid = 0
+        book_ids = set()
+        started = time.monotonic()
+        with open(path, newline="", encoding="utf-8") as stream:
+            rows = self.read_rows(stream, input_format)
+            for row in islice(rows, done):
+                if self.kind == "relations" and str(row.get("book")).isdigit():
+                    book_ids.add(int(row["book"]))
+
+            while batch := list(islice(rows, options["batch_size"])):
+                batch_started = time.monotonic()
+                objs, errors = self.build_objects(batch, done)
+                done += len(batch)
+                # The progress commits with the batch, so a resumed import
+                # never inserts a batch twice nor skips an uncommitted one.
+                with transaction.atomic():
+                    self.insert(objs)
+                    self.write_progress(progress_key, done)
+
+                imported += len(objs)
+                invalid += len(errors)
+                if self.kind == "relations":
+                    book_ids.update(obj.book_id for obj in objs)
+                for error in errors:
+                    self.stderr.write(error)
+                elapsed = max(time.monotonic() - batch_started, 1e-9)
+                self.stdout.write(
+                    f"{done} rows processed, {len(batch) / elapsed:.0f} rows/s",
+                    ending="\r" if options["verbosity"] < 2 else "\n",
+                )
+
+        if self.kind == "books" and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Book]):
+                    cursor.execute(sql)
+        if book_ids:
+            recompute_book_aggregates(book_ids)
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nImported {imported} {self.kind}, skipped {invalid} invalid rows "
+                f"in {elapsed:.1f}s ({imported / elapsed:.0f} rows/s)."
+            )
+        )
+
+    def read_rows(self, stream, input_format):
+        """
+        Yields the rows of the input file as dictionaries.
+
+        Args:
+            stream: The opened input file.
+            input_format: Either "csv" or "jsonl".
+        """
+        if input_format == "csv":
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+    def build_objects(self, batch, offset):
+        """
+        Validates a batch of rows and builds the model instances to insert.
+
+        Args:
+            batch: The rows of the batch.
+            offset: The number of rows processed before the batch.
+
+        Returns:
+            tuple: The valid instances and the error messages of invalid rows.
+        """
+        fields = BOOK_FIELDS if self.kind == "books" else RELATION_FIELDS
+        user_field = "owner" if self.kind == "books" else "user"
+        self.load_users(row.get(user_field) for row in batch)
+        book_field = "id" if self.kind == "books" else "book"
+        existing_books = set(
+            Book.objects.filter(
+                id__in=[
+                    row[book_field]
+                    for row in batch
+                    if str(row.get(book_field)).isdigit()
+                ]
+            ).values_list("id", flat=True)
+        )
+
+        objs, errors = [], []
+        pairs = set()
+        if self.kind == "relations":
+            pairs = self.load_relation_pairs(batch)
+        for line, row in enumerate(batch, start=offset + 1):
+            values = {
+                field: row[field]
+                for field in fields
+                if row.get(field) not in (None, "")
+            }
+            username = values.pop(user_field, None)
+            try:
+                if username is not None:
+                    if username not in self.users:
+                        raise ValidationError({user_field: "Unknown username."})
+                    values[f"{user_field}_id"] = self.users[username]
+                if self.kind == "books":
+                    if "id" in values:
+                        values["id"] = int(values["id"])
+                        if values["id"] in existing_books:
+                            raise ValidationError({"id": "The book already exists."})
+                        existing_books.add(values["id"])
+                    obj = Book(**values)
+                    obj.clean_fields(exclude=["owner", "rating", "change_version"])
+                else:
+                    if "book" not in values or username is None:
+                        raise ValidationError("Both user and book are required.")
+                    values["book_id"] = int(values.pop("book"))
+                    if values["book_id"] not in existing_books:
+                        raise ValidationError({"book": "Unknown book id."})
+                    pair = (values["user_id"], values["book_id"])
+                    if pair in pairs:
+                        raise ValidationError("The relation already exists.")
+                    pairs.add(pair)
+                    obj = UserBookRelation(**values)
+                    obj.clean_fields(
+                        exclude=["user", "book"]
+                        + ([] if "rating" in values else ["rating"])
+                    )
+            except (ValidationError, TypeError, ValueError) as exc:
+                errors.append(f"Row {line}: {exc}")
+                continue
+            objs.append(obj)
+        return objs, errors
+
+    def load_users(self, usernames):
+        """
+        Caches the ids of the given usernames that aren't cached yet.
+
+        Args:
+            usernames: The usernames referenced by a batch.
+        """
+        missing = {name for name in usernames if name} - self.users.keys()
+        if missing:
+            self.users.update(
+                User.objects.filter(username__in=missing).values_list("username", "id")
+            )
+
+    def load_relation_pairs(self, batch):
+        """
+        Returns the (user id, book id) pairs of a batch that already exist.
+
+        Args:
+            batch: The rows of the batch.
+
+        Returns:
+            set: The existing pairs.
+        """
+        user_ids = {
+            self.users[row["user"]] for row in batch if row.get("user") in self.users
+        }
+        book_ids = {int(row["book"]) for row in batch if str(row.get("book")).isdigit()}
+        if not user_ids or not book_ids:
+            return set()
+        return set(
+            UserBookRelation.objects.filter(
+                user_id__in=user_ids, book_id__in=book_ids
+            ).values_list("user_id", "book_id")
+        )
+
+    def insert(self, objs):
+        """
+        Inserts the instances of a batch with bulk_create or COPY.
+
+        Args:
+            objs: The instances to insert.
+        """
+        if not objs:
+            return
+        model = type(objs[0])
+        if model is Book:
+            last_version = next_change_version(len(objs))
+            for version, obj in enumerate(objs, start=last_version - len(objs) + 1):
+                obj.change_version = version
+        with_pk = {obj.pk is not None for obj in objs}
+        if not self.use_copy or len(with_pk) > 1:
+            # Relations are deduplicated by the command, ignoring conflicts
+            # only guards against pairs created concurrently.
+            model.objects.bulk_create(
+                objs,
+                batch_size=len(objs),
+                ignore_conflicts=model is UserBookRelation,
+            )
+            return
+
+        fields = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key or objs[0].pk is not None
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            writer.writerow([self.copy_value(obj, field) for field in fields])
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} "
+                f"({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def copy_value(self, obj, field):
+        # pre_save() fills the auto_now fields, as bulk_create does.
+        value = field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+        return "\\N" if value is None else value
+
+    def read_progress(self, progress_key):
+        return (
+            ImportProgress.objects.filter(key=progress_key)
+            .values_list("rows", flat=True)
+            .first()
+            or 0
+        )
+
+    def write_progress(self, progress_key, done):
+        ImportProgress.objects.update_or_create(
+            key=progress_key, defaults={"rows": done}
+        )
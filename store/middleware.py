@@ -0,0 +1,95 @@
+import brotli
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+from store.auth import get_cached_user
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+re_accepts_gzip = _lazy_re_compile(r"\bgzip\b")
+
+
+class CompressionMiddleware:
+    """
+    A middleware that compresses responses with brotli or gzip.
+
+    Brotli is preferred when the client accepts it. Responses shorter than
+    ``RESPONSE_COMPRESSION_MIN_SIZE`` bytes, streaming responses and responses
+    that already carry a content encoding are left untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, "RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+        self.brotli_quality = getattr(
+            settings, "RESPONSE_COMPRESSION_BROTLI_QUALITY", 5
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or len(response.content) < self.min_size:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if re_accepts_brotli.search(accept_encoding):
+            encoding = "br"
+        elif re_accepts_gzip.search(accept_encoding):
+            encoding = "gzip"
+        else:
+            return response
+        compressed_content = self.compress(response.content, encoding)
+
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compress(self, content, encoding):
+        """
+        Compresses content the way responses are compressed.
+
+        Args:
+            content: The bytes to compress.
+            encoding: Either "br" or "gzip".
+
+        Returns:
+            bytes: The compressed content.
+        """
+        if encoding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    An authentication middleware resolving the session user from the cache.
+
+    The user is loaded lazily, like with ``AuthenticationMiddleware``, but
+    from a slim snapshot cached per user, so authenticated requests don't
+    query the user table in the steady state.
+    """
+
+    def process_request(self, request):
+        assert hasattr(request, "session"), (
+            "The authentication middleware requires session middleware "
+            "to be installed."
+        )
+        request.user = SimpleLazyObject(lambda: self.get_user(request))
+
+    def get_user(self, request):
+        if not hasattr(request, "_cached_user"):
+            request._cached_user = get_cached_user(request)
+        return request._cached_user
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.1 on 2026-10-19 19:53
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_change_versions(apps, schema_editor):
+    Book = apps.get_model("store", "Book")
+    ChangeCounter = apps.get_model("store", "ChangeCounter")
+
+    # Book ids are unique, so they serve as the initial change versions.
+    Book.objects.update(change_version=F("id"))
+    last_id = Book.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+    ChangeCounter.objects.update_or_create(pk=1, defaults={"value": last_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0007_book_rating_alter_book_owner_alter_book_readers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("book_id", models.BigIntegerField(unique=True)),
+                ("change_version", models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="change_version",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(
+            backfill_change_versions,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-19 19:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0008_book_change_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarBook",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_books",
+                        to="store.book",
+                    ),
+                ),
+                (
+                    "similar_book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="store.book",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="similarbook",
+            index=models.Index(
+                fields=["book", "-score"], name="similar_book_score_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.1 on 2026-10-19 20:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Book = apps.get_model("store", "Book")
+    UserBookRelation = apps.get_model("store", "UserBookRelation")
+
+    Book.objects.update(
+        likes_count=Coalesce(
+            Subquery(
+                UserBookRelation.objects.filter(book=OuterRef("pk"), like=True)
+                .values("book")
+                .annotate(likes=Count("id"))
+                .values("likes")
+            ),
+            0,
+        )
+    )
+
+
+def create_rating_desc_index(apps, schema_editor):
+    # Only PostgreSQL supports NULLS LAST in index definitions; it lets
+    # "ordering=-rating" read unrated books last straight from the index.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX book_rating_desc_idx "
+            "ON store_book (rating DESC NULLS LAST, id DESC)"
+        )
+
+
+def drop_rating_desc_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS book_rating_desc_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0009_similarbook"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["price", "id"], name="book_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["author_name", "id"], name="book_author_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["rating", "id"], name="book_rating_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["likes_count", "id"], name="book_likes_count_idx"
+            ),
+        ),
+        migrations.RunPython(create_rating_desc_index, drop_rating_desc_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.1 on 2026-10-19 20:07
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_counts(apps, schema_editor):
+    Book = apps.get_model("store", "Book")
+    UserBookRelation = apps.get_model("store", "UserBookRelation")
+
+    Book.objects.update(
+        **{
+            f"rating_{value}_count": Coalesce(
+                Subquery(
+                    UserBookRelation.objects.filter(book=OuterRef("pk"), rating=value)
+                    .values("book")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            )
+            for value in range(1, 6)
+        },
+        rating=Subquery(
+            UserBookRelation.objects.filter(book=OuterRef("pk"), rating__isnull=False)
+            .values("book")
+            .annotate(rating=Avg("rating"))
+            .values("rating")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0010_book_likes_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_counts, migrations.RunPython.noop),
+    ]
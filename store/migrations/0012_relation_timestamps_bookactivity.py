@@ -0,0 +1,72 @@
+# Generated by Django 5.1.1 on 2026-10-19 20:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0011_book_rating_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userbookrelation",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="userbookrelation",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name="BookActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("likes", models.IntegerField(default=0)),
+                ("bookmarks", models.IntegerField(default=0)),
+                ("ratings", models.PositiveIntegerField(default=0)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="store.book",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="bookactivity",
+            index=models.Index(
+                fields=["period", "bucket"], name="book_activity_period_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="bookactivity",
+            constraint=models.UniqueConstraint(
+                fields=("book", "period", "bucket"), name="book_activity_bucket"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-19 20:22
+
+from django.db import migrations, models
+
+
+def create_search_indexes(apps, schema_editor):
+    # The admin "^field" searches run UPPER(field) LIKE 'X%'. Only PostgreSQL
+    # can serve that from an index, and only with a pattern operator class.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX book_name_search_idx "
+            "ON store_book (UPPER(name::text) text_pattern_ops)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX book_author_name_search_idx "
+            "ON store_book (UPPER(author_name::text) text_pattern_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS book_name_search_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS book_author_name_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0012_relation_timestamps_bookactivity"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userbookrelation",
+            index=models.Index(fields=["like", "id"], name="relation_like_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userbookrelation",
+            index=models.Index(
+                fields=["in_bookmarks", "id"], name="relation_bookmarks_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userbookrelation",
+            index=models.Index(fields=["rating", "id"], name="relation_rating_idx"),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
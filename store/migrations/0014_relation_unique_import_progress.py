@@ -0,0 +1,89 @@
+# Generated by Django 5.1.1 on 2026-10-19 20:25
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicate_relations(apps, schema_editor):
+    Book = apps.get_model("store", "Book")
+    ChangeCounter = apps.get_model("store", "ChangeCounter")
+    UserBookRelation = apps.get_model("store", "UserBookRelation")
+
+    duplicates = (
+        UserBookRelation.objects.values("user", "book")
+        .annotate(first_id=Min("id"), relations=Count("id"))
+        .filter(relations__gt=1)
+    )
+    book_ids = set()
+    for pair in list(duplicates):
+        UserBookRelation.objects.filter(user=pair["user"], book=pair["book"]).exclude(
+            id=pair["first_id"]
+        ).delete()
+        book_ids.add(pair["book"])
+    if not book_ids:
+        return
+
+    def relation_count(**filters):
+        return Coalesce(
+            Subquery(
+                UserBookRelation.objects.filter(book=OuterRef("pk"), **filters)
+                .values("book")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    Book.objects.filter(id__in=book_ids).update(
+        rating=Subquery(
+            UserBookRelation.objects.filter(book=OuterRef("pk"))
+            .values("book")
+            .annotate(rating=Avg("rating"))
+            .values("rating")
+        ),
+        likes_count=relation_count(like=True),
+        **{
+            f"rating_{value}_count": relation_count(rating=value)
+            for value in range(1, 6)
+        },
+    )
+    # Only the books that had duplicates change, a version each.
+    counter, _ = ChangeCounter.objects.get_or_create(pk=1)
+    for book_id in sorted(book_ids):
+        counter.value += 1
+        Book.objects.filter(id=book_id).update(change_version=counter.value)
+    counter.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0013_relation_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                ("rows", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(delete_duplicate_relations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="userbookrelation",
+            constraint=models.UniqueConstraint(
+                fields=("user", "book"), name="user_book_relation_unique"
+            ),
+        ),
+    ]
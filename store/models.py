@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class Book(models.Model):
@@ -12,9 +12,15 @@ class Book(models.Model):
         owner (models.ForeignKey): The owner of the book.
         readers (models.ManyToManyField): The readers of the book.
         rating (models.DecimalField): The rating of the book.
+        likes_count (models.PositiveIntegerField): The number of likes of the book.
+        rating_1_count .. rating_5_count (models.PositiveIntegerField): The number
+            of relations rating the book with each of the rate choices.
+        change_version (models.BigIntegerField): The change version of the last edit.
 
     Methods:
         __str__: Returns a string representation of the book.
+        save: Saves the book and bumps its change version.
+        rating_distribution: Returns the number of ratings per rate choice.
     """
 
     name = models.CharField(max_length=255)
@@ -37,10 +43,55 @@ class Book(models.Model):
         null=True,
         default=None,
     )
+    likes_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    change_version = models.BigIntegerField(default=0, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["price", "id"], name="book_price_idx"),
+            models.Index(fields=["author_name", "id"], name="book_author_name_idx"),
+            models.Index(fields=["rating", "id"], name="book_rating_idx"),
+            models.Index(fields=["likes_count", "id"], name="book_likes_count_idx"),
+        ]
 
     def __str__(self):
         return f"Name={self.name} with Price={self.price}"
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the book and bumps its change version.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        from store.logic import next_change_version
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "change_version"}
+        with transaction.atomic(savepoint=False):
+            self.change_version = next_change_version()
+            super().save(*args, **kwargs)
+
+    @property
+    def rating_distribution(self):
+        """
+        Returns the number of ratings per rate choice.
+
+        Returns:
+            dict: Maps every rate choice to its number of ratings.
+        """
+        return {
+            value: getattr(self, f"rating_{value}_count")
+            for value, _ in UserBookRelation.RATE_CHOICES
+        }
+
 
 class UserBookRelation(models.Model):
     """
@@ -52,10 +103,12 @@ class UserBookRelation(models.Model):
         like (models.BooleanField): Whether the user likes the book.
         in_bookmarks (models.BooleanField): Whether the book is in the user's bookmarks.
         rating (models.PositiveSmallIntegerField): The rating of the book by the user.
+        created_at (models.DateTimeField): When the relation was created.
+        updated_at (models.DateTimeField): When the relation was last changed.
 
     Methods:
         __str__: Returns a string representation of the relation.
-        __save__: Saves the relation and sets the rating of the book.
+        save: Saves the relation and refreshes the aggregates of the book.
     """
 
     RATE_CHOICES = (
@@ -78,6 +131,20 @@ class UserBookRelation(models.Model):
     like = models.BooleanField(default=False)
     in_bookmarks = models.BooleanField(default=False)
     rating = models.PositiveSmallIntegerField(choices=RATE_CHOICES, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "book"], name="user_book_relation_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["like", "id"], name="relation_like_idx"),
+            models.Index(fields=["in_bookmarks", "id"], name="relation_bookmarks_idx"),
+            models.Index(fields=["rating", "id"], name="relation_rating_idx"),
+        ]
 
     def __str__(self):
         """
@@ -88,20 +155,163 @@ class UserBookRelation(models.Model):
         """
         return f"{self.user.username} liked {self.book.name} rating {self.rating}"
 
-    def __save__(self, *args, **kwargs):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.old_like = self.like
+        self.old_in_bookmarks = self.in_bookmarks
+        self.old_rating = self.rating
+
+    def save(self, *args, **kwargs):
         """
-        Saves the relation and sets the rating of the book.
+        Saves the relation and refreshes the aggregates of the book.
 
         Args:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
         """
-        from store.logic import set_rating
+        from store.logic import record_activity, update_book_aggregates
 
         creating = not self.pk
-        old_rating = self.book.rating
-        super().save(*args, **kwargs)
+        old_like = False if creating else self.old_like
+        old_in_bookmarks = False if creating else self.old_in_bookmarks
+        old_rating = None if creating else self.old_rating
+        likes_delta = int(self.like) - int(old_like)
+        bookmarks_delta = int(self.in_bookmarks) - int(old_in_bookmarks)
+        rated = self.rating is not None and self.rating != old_rating
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if likes_delta or bookmarks_delta or rated:
+                record_activity(self.book_id, likes_delta, bookmarks_delta, rated)
+            # Last, so the change version counter is locked only until commit.
+            if creating or likes_delta or old_rating != self.rating:
+                update_book_aggregates(
+                    self.book_id, likes_delta, old_rating, self.rating
+                )
+        self.old_like = self.like
+        self.old_in_bookmarks = self.in_bookmarks
+        self.old_rating = self.rating
+
+
+class ChangeCounter(models.Model):
+    """
+    A single-row model holding the last issued book change version.
+
+    Attributes:
+        value (models.BigIntegerField): The last issued change version.
+    """
+
+    value = models.BigIntegerField(default=0)
+
+
+class ImportProgress(models.Model):
+    """
+    A model recording how many rows of an import input have been committed.
+
+    Attributes:
+        key (models.CharField): Identifies the import, the input path by default.
+        rows (models.PositiveBigIntegerField): The number of committed rows.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    rows = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.rows} rows"
+
+
+class BookTombstone(models.Model):
+    """
+    A model recording the deletion of a book for delta sync clients.
+
+    Attributes:
+        book_id (models.BigIntegerField): The id of the deleted book.
+        change_version (models.BigIntegerField): The change version of the deletion.
+    """
 
-        new_rating = self.book.rating
-        if old_rating != new_rating or creating:
-            set_rating(self.book)
+    book_id = models.BigIntegerField(unique=True)
+    change_version = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Deleted book={self.book_id} at version {self.change_version}"
+
+
+class SimilarBook(models.Model):
+    """
+    A model representing a precomputed "readers who liked this also liked" pair.
+
+    Attributes:
+        book (models.ForeignKey): The book the recommendation is made for.
+        similar_book (models.ForeignKey): The recommended book.
+        score (models.FloatField): The cosine similarity of the two books.
+
+    Methods:
+        __str__: Returns a string representation of the pair.
+    """
+
+    book = models.ForeignKey(
+        "Book",
+        on_delete=models.CASCADE,
+        related_name="similar_books",
+    )
+    similar_book = models.ForeignKey(
+        "Book",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["book", "-score"], name="similar_book_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} is similar to {self.similar_book_id} ({self.score})"
+
+
+class BookActivity(models.Model):
+    """
+    A model representing the like, bookmark and rating activity of a book
+    during an hour or a day.
+
+    Attributes:
+        book (models.ForeignKey): The book the activity happened on.
+        period (models.CharField): The length of the bucket, an hour or a day.
+        bucket (models.DateTimeField): The start of the bucket.
+        likes (models.IntegerField): Likes added minus likes removed.
+        bookmarks (models.IntegerField): Bookmarks added minus bookmarks removed.
+        ratings (models.PositiveIntegerField): The number of ratings set or changed.
+
+    Methods:
+        __str__: Returns a string representation of the activity.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    PERIOD_CHOICES = (
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    )
+    book = models.ForeignKey(
+        "Book",
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    likes = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    ratings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "period", "bucket"], name="book_activity_bucket"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["period", "bucket"], name="book_activity_period_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} {self.period} {self.bucket:%Y-%m-%d %H:00}"
@@ -0,0 +1,50 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that reads the row count of an unfiltered queryset from the
+    planner statistics instead of running an exact ``COUNT(*)``.
+
+    The estimate is only used on PostgreSQL, for querysets without a WHERE
+    clause, and when the table is large enough for an exact count to hurt.
+    Everywhere else it falls back to the regular exact count.
+
+    Attributes:
+        estimate_threshold (int): Row estimate below which an exact count is used.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is None or estimate < self.estimate_threshold:
+            return super().count
+        return estimate
+
+    def _estimated_count(self):
+        """
+        Returns the planner's row estimate for the queryset's table.
+
+        Returns:
+            int | None: The estimated row count, or None if no estimate applies.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if not row or row[0] < 0:
+            return None
+        return row[0]
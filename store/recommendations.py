@@ -0,0 +1,67 @@
+import numpy as np
+from scipy import sparse
+
+
+def build_like_matrix(user_ids, book_ids):
+    """
+    Builds a binary user x book matrix from parallel arrays of interactions.
+
+    Args:
+        user_ids: The user id of every positive interaction.
+        book_ids: The book id of every positive interaction.
+
+    Returns:
+        tuple: The CSR matrix and the book ids of its columns.
+    """
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    books, book_index = np.unique(book_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(user_index), dtype=np.float32), (user_index, book_index)),
+        shape=(len(users), len(books)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, books
+
+
+def top_k_similar(matrix, top_k, chunk_size=1024):
+    """
+    Computes the top-K cosine similar columns for every column of a matrix.
+
+    The item x item product is computed in column chunks so memory stays
+    bounded by ``chunk_size`` dense rows at a time.
+
+    Args:
+        matrix: The user x book CSR matrix.
+        top_k: The number of similar books to keep per book.
+        chunk_size: The number of books scored per batch.
+
+    Yields:
+        tuple: Arrays of source column, similar column and score per chunk.
+    """
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    normalized = sparse.csc_matrix(matrix.multiply(1 / norms))
+    transposed = normalized.T.tocsr()
+    n_books = matrix.shape[1]
+    k = min(top_k, n_books - 1)
+    if k <= 0:
+        return
+
+    for start in range(0, n_books, chunk_size):
+        stop = min(start + chunk_size, n_books)
+        scores = (transposed[start:stop] @ normalized).toarray()
+        rows = np.arange(stop - start)
+        scores[rows, rows + start] = 0
+
+        columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, columns, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        columns = np.take_along_axis(columns, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        sources = np.repeat(rows + start, k)
+        columns = columns.ravel()
+        top_scores = top_scores.ravel()
+        positive = top_scores > 0
+        yield sources[positive], columns[positive], top_scores[positive]
@@ -0,0 +1,58 @@
+import datetime
+import decimal
+import uuid
+
+import cbor2
+import msgpack
+from rest_framework.renderers import BaseRenderer
+
+
+def encode_default(obj):
+    """
+    Converts values the binary encoders can't pack natively to strings.
+
+    Args:
+        obj: The value to convert.
+
+    Returns:
+        str: The string representation of the value.
+    """
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the response data as MessagePack.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class CBORRenderer(BaseRenderer):
+    """
+    Renders the response data as CBOR.
+    """
+
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return cbor2.dumps(
+            data, default=lambda encoder, obj: encoder.encode(encode_default(obj))
+        )
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from store.models import Book, UserBookRelation
+from store.models import Book, BookActivity, SimilarBook, UserBookRelation
 
 
 class BookReaderSerializer(serializers.ModelSerializer):
@@ -25,6 +25,9 @@ class BookSerializer(serializers.ModelSerializer):
         source="owner.username", default="not owner", read_only=True
     )
     readers = BookReaderSerializer(many=True, read_only=True)
+    rating_distribution = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
     # likes_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -36,6 +39,7 @@ class BookSerializer(serializers.ModelSerializer):
             "author_name",
             "annotated_likes",
             "rating",
+            "rating_distribution",
             "owner_name",
             "readers",
             # "likes_count",
@@ -49,3 +53,21 @@ class UserBookRelationSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserBookRelation
         fields = ["book", "like", "in_bookmarks", "rating"]
+
+
+class SimilarBookSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="similar_book_id", read_only=True)
+    name = serializers.CharField(source="similar_book.name", read_only=True)
+    author_name = serializers.CharField(
+        source="similar_book.author_name", read_only=True
+    )
+
+    class Meta:
+        model = SimilarBook
+        fields = ("id", "name", "author_name", "score")
+
+
+class BookActivitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookActivity
+        fields = ("bucket", "likes", "bookmarks", "ratings")
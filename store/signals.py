@@ -0,0 +1,201 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from store.auth import invalidate_cached_user
+from store.autocomplete import autocomplete_index
+from store.cache import book_detail_cache
+from store.events import broadcaster
+from store.logic import (
+    next_change_version,
+    record_activity,
+    update_book_aggregates,
+)
+from store.models import Book, BookTombstone, UserBookRelation
+
+_deleting = threading.local()
+
+
+def deleting_book_ids():
+    """
+    Returns the ids of the books being deleted by this thread.
+
+    Returns:
+        set[int]: The ids of the books.
+    """
+    if not hasattr(_deleting, "book_ids"):
+        _deleting.book_ids = set()
+    return _deleting.book_ids
+
+
+@receiver(pre_delete, sender=Book)
+def track_deleted_book(sender, instance, **kwargs):
+    """
+    Marks a book as being deleted until its own post_delete signal.
+
+    A deletion sends pre_delete for every collected object first, then
+    deletes the relations of the book before the book itself, so the
+    receivers of the relations can skip the work made moot by the deletion.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The book to delete.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    deleting_book_ids().add(instance.pk)
+
+
+@receiver(post_delete, sender=Book)
+def untrack_deleted_book(sender, instance, **kwargs):
+    deleting_book_ids().discard(instance.pk)
+
+
+@receiver(post_delete, sender=Book)
+def record_book_tombstone(sender, instance, **kwargs):
+    """
+    Records a tombstone for a deleted book so delta sync clients drop it.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The deleted book.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    BookTombstone.objects.update_or_create(
+        book_id=instance.pk,
+        defaults={"change_version": next_change_version()},
+    )
+
+
+@receiver(post_delete, sender=UserBookRelation)
+def update_deleted_relation_book(sender, instance, **kwargs):
+    """
+    Removes a deleted relation from the persisted aggregates of its book and,
+    once committed, from the current activity rollups.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The deleted relation.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.book_id
+    if book_id in deleting_book_ids():
+        return
+    likes_delta = -int(instance.like)
+    bookmarks_delta = -int(instance.in_bookmarks)
+    update_book_aggregates(book_id, likes_delta, old_rating=instance.rating)
+    if not likes_delta and not bookmarks_delta:
+        return
+
+    def remove_relation_activity():
+        # Deleting a book deletes its relations first, and its activity with it.
+        if not Book.objects.filter(pk=book_id).exists():
+            return
+        try:
+            with transaction.atomic():
+                record_activity(book_id, likes_delta, bookmarks_delta)
+        except IntegrityError:
+            # The book was deleted in between.
+            pass
+
+    transaction.on_commit(remove_relation_activity)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_detail(sender, instance, **kwargs):
+    """
+    Drops the cached detail representation of a saved or deleted book.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The saved or deleted book.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.pk
+    book_detail_cache.invalidate(book_id)
+    # A concurrent request may cache the pre-commit row under the new version.
+    transaction.on_commit(lambda: book_detail_cache.invalidate(book_id))
+
+
+@receiver(post_save, sender=UserBookRelation)
+@receiver(post_delete, sender=UserBookRelation)
+def invalidate_relation_book_detail(sender, instance, **kwargs):
+    """
+    Drops the cached detail representation of the book of a relation.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The saved or deleted relation.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.book_id
+    if book_id in deleting_book_ids():
+        return
+    book_detail_cache.invalidate(book_id)
+    transaction.on_commit(lambda: book_detail_cache.invalidate(book_id))
+
+
+@receiver(post_save, sender=UserBookRelation)
+@receiver(post_delete, sender=UserBookRelation)
+def publish_relation_change(sender, instance, **kwargs):
+    """
+    Publishes the book of a changed relation to server-sent event listeners.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The saved or deleted relation.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.book_id
+    if book_id in deleting_book_ids():
+        return
+    transaction.on_commit(lambda: broadcaster.publish(book_id))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=UserBookRelation)
+@receiver(post_delete, sender=UserBookRelation)
+def refresh_autocomplete_entry(sender, instance, **kwargs):
+    """
+    Schedules the autocomplete entry of a changed book for a refresh.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The saved book or the saved or deleted relation.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.pk if sender is Book else instance.book_id
+    transaction.on_commit(lambda: autocomplete_index.mark_dirty(book_id))
+
+
+@receiver(post_delete, sender=Book)
+def remove_autocomplete_entry(sender, instance, **kwargs):
+    """
+    Removes a deleted book from the autocomplete index.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The deleted book.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    book_id = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.remove(book_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    """
+    Drops the cached snapshot of a changed or deleted user.
+
+    Args:
+        sender: The model class that sent the signal.
+        instance: The saved or deleted user.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
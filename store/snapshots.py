@@ -0,0 +1,196 @@
+import gzip
+import os
+import shutil
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from store.models import ChangeCounter
+from store.serializers import BookSerializer
+
+CURRENT = "current"
+
+
+def snapshot_root():
+    return Path(settings.CATALOG_SNAPSHOT_ROOT)
+
+
+def write_document(path, content):
+    """
+    Writes a document and its precompressed ``.gz`` variant.
+
+    Args:
+        path: The path of the document.
+        content: The rendered bytes.
+    """
+    path.write_bytes(content)
+    with open(f"{path}.gz", "wb") as stream:
+        with gzip.GzipFile(fileobj=stream, mode="wb", mtime=0) as compressed:
+            compressed.write(content)
+
+
+def parse_version(version):
+    """
+    Returns the build time and the change cursor encoded in a snapshot name.
+
+    Args:
+        version: The name of the snapshot directory.
+
+    Returns:
+        tuple: The build time in nanoseconds and the change cursor.
+    """
+    built_at, cursor = version.split("-")
+    return int(built_at), int(cursor)
+
+
+def build_snapshot(queryset, chunk_size=500, keep=2):
+    """
+    Renders the book list and every book detail to a new snapshot directory
+    and atomically makes it the active snapshot.
+
+    Books are serialized in id-ordered chunks, so memory stays bounded by
+    ``chunk_size`` books while the list document is streamed to disk. The
+    snapshot is named after its build time and the change cursor read before
+    rendering: a book whose change version is past the cursor may have been
+    rendered stale.
+
+    Args:
+        queryset: The annotated book queryset the live views render.
+        chunk_size: The number of books serialized at a time.
+        keep: The number of snapshot versions kept on disk.
+
+    Returns:
+        tuple: The snapshot directory and the number of books rendered.
+    """
+    if keep < 1:
+        raise ValueError("At least one snapshot version must be kept.")
+    cursor = ChangeCounter.objects.values_list("value", flat=True).first() or 0
+    root = snapshot_root()
+    version = root / f"{time.time_ns()}-{cursor}"
+    books_dir = version / "books"
+    books_dir.mkdir(parents=True)
+
+    renderer = JSONRenderer()
+    last_id, count = 0, 0
+    list_path = version / "list.json"
+    with open(list_path, "wb") as stream:
+        stream.write(b"[")
+        while True:
+            books = list(queryset.filter(id__gt=last_id).order_by("id")[:chunk_size])
+            if not books:
+                break
+            for book in books:
+                data = BookSerializer(book).data
+                content = renderer.render(data)
+                write_document(books_dir / f"{book.id}.json", content)
+                stream.write(b"," if count else b"")
+                stream.write(content)
+                count += 1
+            last_id = books[-1].id
+        stream.write(b"]")
+    write_document(list_path, list_path.read_bytes())
+
+    link = root / f"{CURRENT}.tmp"
+    if link.is_symlink():
+        link.unlink()
+    link.symlink_to(version.name)
+    os.replace(link, root / CURRENT)
+
+    versions = sorted(
+        path for path in root.iterdir() if path.is_dir() and not path.is_symlink()
+    )
+    for old in versions[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version, count
+
+
+def book_document_id(name):
+    """
+    Returns the book id of a book detail document name, or None.
+
+    Args:
+        name: The path of the document inside the snapshot.
+    """
+    directory, _, filename = name.partition("/")
+    if directory != "books":
+        return None
+    return int(Path(filename).stem)
+
+
+def snapshot_document(name, change_version=None):
+    """
+    Returns the path of a document of the active snapshot.
+
+    Snapshots older than ``CATALOG_SNAPSHOT_MAX_AGE`` seconds are not served.
+    The document of a book is only served for the change version of the book
+    the caller read, and only if the book has not changed since the snapshot
+    was built, so checking it costs no query of its own.
+
+    Args:
+        name: The path of the document inside the snapshot.
+        change_version: The current change version of the book of a book
+            detail document.
+
+    Returns:
+        Path | None: The path of the document, or None if it must be rendered
+            live.
+    """
+    current = snapshot_root() / CURRENT
+    try:
+        version = os.readlink(current)
+        built_at, cursor = parse_version(version)
+    except (OSError, ValueError):
+        return None
+    max_age = getattr(settings, "CATALOG_SNAPSHOT_MAX_AGE", 300)
+    if time.time_ns() - built_at > max_age * 1_000_000_000:
+        return None
+    if book_document_id(name) is not None and (
+        change_version is None or change_version > cursor
+    ):
+        return None
+    path = current.parent / version / name
+    if not path.is_file():
+        return None
+    return path
+
+
+def snapshot_response(request, path):
+    """
+    Returns the response serving a snapshot document.
+
+    The precompressed variant is served when the client accepts gzip. When
+    ``CATALOG_SNAPSHOT_ACCEL_PREFIX`` is set, the file is handed off to the
+    front web server with ``X-Accel-Redirect`` instead of being read here.
+
+    Args:
+        request: The request to respond to.
+        path: The path of the document, as returned by ``snapshot_document``.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    version = path.relative_to(snapshot_root()).parts[0]
+    encoding = None
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        encoding = "gzip"
+        path = path.with_name(f"{path.name}.gz")
+
+    accel_prefix = getattr(settings, "CATALOG_SNAPSHOT_ACCEL_PREFIX", None)
+    if accel_prefix:
+        response = HttpResponse(content_type="application/json")
+        response["X-Accel-Redirect"] = (
+            f"{accel_prefix.rstrip('/')}/{path.relative_to(snapshot_root())}"
+        )
+    else:
+        response = FileResponse(open(path, "rb"), content_type="application/json")
+        response["Content-Length"] = str(path.stat().st_size)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["ETag"] = f'"{version}-{path.name}"'
+    response["Cache-Control"] = "public, max-age=60"
+    patch_vary_headers(response, ("Accept", "Accept-Encoding", "Cookie"))
+    return response
@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from store.models import Book, UserBookRelation
+from store.paginators import EstimatedCountPaginator
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    def setUp(self):
+        for i in range(3):
+            Book.objects.create(name=f"Book {i}", price="10", author_name="Author")
+
+    def test_falls_back_to_exact_count(self):
+        paginator = EstimatedCountPaginator(Book.objects.order_by("id"), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_filtered_queryset_uses_exact_count(self):
+        paginator = EstimatedCountPaginator(
+            Book.objects.filter(name="Book 1").order_by("id"), 2
+        )
+        self.assertEqual(paginator.count, 1)
+
+
+class UserBookRelationAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test_password"
+        )
+        self.client.force_login(self.admin)
+        # Warm the cached session user up before counting queries.
+        self.client.get(reverse("admin:index"))
+
+    def _create_relations(self, start, stop):
+        for i in range(start, stop):
+            user = User.objects.create_user(username=f"user {i}")
+            book = Book.objects.create(
+                name=f"Book {i}", price="10", author_name="Author"
+            )
+            UserBookRelation.objects.create(user=user, book=book, like=True)
+
+    def _changelist_queries(self):
+        url = reverse("admin:store_userbookrelation_changelist")
+        with CaptureQueriesContext(connection=connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self._create_relations(0, 2)
+        small = self._changelist_queries()
+        self._create_relations(2, 12)
+        self.assertEqual(self._changelist_queries(), small)
+
+    def test_search_by_exact_username(self):
+        self._create_relations(0, 2)
+        url = reverse("admin:store_userbookrelation_changelist")
+        response = self.client.get(url, {"q": '"user 1"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 1)
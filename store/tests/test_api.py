@@ -1,15 +1,27 @@
+import gzip
 import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
+import brotli
+import cbor2
+import msgpack
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import connection
 from django.db.models import Case, Count, When
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from store.models import Book, UserBookRelation
+from store.cache import book_detail_cache
+from store.models import Book, BookActivity, UserBookRelation
 from store.serializers import BookSerializer
+from store.views import BookViewSet, UserBookRelationalView
 
 
 class BookApiTestCase(APITestCase):
@@ -200,6 +212,44 @@ class BooksRelationApiTestCase(APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertTrue(relation.like)
 
+    def test_make_like_on_missing_book(self) -> None:
+        self.client.force_login(self.user1)
+        for book_id in ("abc", self.book2.id + 1):
+            response = self.client.patch(
+                f"/book_relation/{book_id}/",
+                data=json.dumps({"like": True}),
+                content_type="application/json",
+            )
+            self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(UserBookRelation.objects.exists())
+
+    def test_first_like_racing_another_request(self) -> None:
+        get_object = UserBookRelationalView.get_object
+
+        def get_object_then_race(view):
+            relation = get_object(view)
+            # A concurrent request creates the relation before this one saves.
+            UserBookRelation.objects.create(user=self.user1, book=self.book1, rating=2)
+            return relation
+
+        self.client.force_login(self.user1)
+        with mock.patch.object(
+            UserBookRelationalView, "get_object", get_object_then_race
+        ):
+            response = self.client.patch(
+                reverse("userbookrelation-detail", args=(self.book1.id,)),
+                data=json.dumps({"like": True}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        relation = UserBookRelation.objects.get(user=self.user1, book=self.book1)
+        self.assertTrue(relation.like)
+        self.assertEqual(relation.rating, 2)
+        self.book1.refresh_from_db()
+        self.assertEqual(self.book1.likes_count, 1)
+        self.assertEqual(self.book1.rating_distribution[2], 1)
+
     def test_make_bookmark(self) -> None:
         url = reverse("userbookrelation-detail", args=(self.book1.id,))
         data = dict(
@@ -254,3 +304,339 @@ class BooksRelationApiTestCase(APITestCase):
             response.status_code,
             response.data,
         )
+
+
+class BookChangesApiTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test_user", password="test_password"
+        )
+        self.book1 = Book.objects.create(
+            name="Test book 1", price="25", author_name="Author 1"
+        )
+        self.book2 = Book.objects.create(
+            name="Test book 2", price="55", author_name="Author 5"
+        )
+        self.url = reverse("book-changes")
+
+    def test_get_all_changes(self) -> None:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["changed"], [self.book1.id, self.book2.id])
+        self.assertEqual(response.data["deleted"], [])
+        self.assertFalse(response.data["has_more"])
+
+    def test_get_changes_since_cursor(self) -> None:
+        cursor = self.client.get(self.url).data["cursor"]
+        UserBookRelation.objects.create(user=self.user, book=self.book2, like=True)
+        deleted_id = self.book1.id
+        self.book1.delete()
+
+        response = self.client.get(self.url, data={"since": cursor})
+        self.assertEqual(response.data["changed"], [self.book2.id])
+        self.assertEqual(response.data["deleted"], [deleted_id])
+
+        response = self.client.get(self.url, data={"since": response.data["cursor"]})
+        self.assertEqual(response.data["changed"], [])
+        self.assertEqual(response.data["deleted"], [])
+
+    def test_get_changes_in_batches(self) -> None:
+        response = self.client.get(self.url, data={"limit": 1})
+        self.assertEqual(response.data["changed"], [self.book1.id])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(
+            self.url, data={"since": response.data["cursor"], "limit": 1}
+        )
+        self.assertEqual(response.data["changed"], [self.book2.id])
+        self.assertFalse(response.data["has_more"])
+
+    def test_get_changes_with_invalid_cursor(self) -> None:
+        response = self.client.get(self.url, data={"since": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookFormatsApiTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test_user", password="test_password"
+        )
+        for i in range(30):
+            Book.objects.create(
+                name=f"Test book {i}",
+                price="25",
+                author_name=f"Author {i}",
+                owner=self.user,
+            )
+        self.url = reverse("book-list")
+
+    def test_get_books_as_msgpack(self) -> None:
+        response = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), response.data)
+
+    def test_get_books_as_cbor(self) -> None:
+        response = self.client.get(self.url, HTTP_ACCEPT="application/cbor")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cbor2.loads(response.content), response.data)
+
+    def test_create_book_from_msgpack(self) -> None:
+        data = dict(name="Test book", price="25", author_name="Author")
+        self.client.force_login(self.user)
+        response = self.client.post(
+            self.url,
+            data=msgpack.packb(data),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 31)
+
+    def test_get_books_compressed(self) -> None:
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip, br", HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(
+            json.loads(brotli.decompress(response.content)),
+            json.loads(json.dumps(response.data)),
+        )
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(
+            json.loads(gzip.decompress(response.content)),
+            json.loads(json.dumps(response.data)),
+        )
+
+    def test_small_response_not_compressed(self) -> None:
+        url = reverse("book-detail", args=(Book.objects.first().id,))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip, br", HTTP_ACCEPT="application/json"
+        )
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class SimilarBooksApiTestCase(APITestCase):
+    def setUp(self):
+        self.books = [
+            Book.objects.create(name=f"Test book {i}", price="25", author_name="A")
+            for i in range(4)
+        ]
+        users = [User.objects.create_user(username=f"user {i}") for i in range(3)]
+        likes = ((0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 2))
+        for user, book in likes:
+            UserBookRelation.objects.create(
+                user=users[user], book=self.books[book], like=True
+            )
+        UserBookRelation.objects.create(user=users[2], book=self.books[3], rating=2)
+        call_command("compute_similar_books", top_k=5, stdout=StringIO())
+
+    def test_get_similar_books(self) -> None:
+        url = reverse("book-similar", args=(self.books[0].id,))
+        with CaptureQueriesContext(connection=connection) as queries:
+            response = self.client.get(url)
+            self.assertEqual(len(queries), 1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book["id"] for book in response.data],
+            [self.books[1].id, self.books[2].id],
+        )
+        self.assertAlmostEqual(response.data[0]["score"], 2 / (3**0.5 * 2**0.5))
+        self.assertGreater(response.data[0]["score"], response.data[1]["score"])
+
+    def test_get_similar_books_for_unliked_book(self) -> None:
+        url = reverse("book-similar", args=(self.books[3].id,))
+        response = self.client.get(url)
+        self.assertEqual(response.data, [])
+
+    def test_get_similar_books_for_missing_book(self) -> None:
+        for book_id in ("abc", self.books[-1].id + 1):
+            response = self.client.get(f"/book/{book_id}/similar/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BookDetailCacheApiTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        book_detail_cache.clear()
+        self.user = User.objects.create_user(
+            username="test_user", password="test_password"
+        )
+        self.book = Book.objects.create(
+            name="Test book 1", price="25", author_name="Author 1", owner=self.user
+        )
+        self.url = reverse("book-detail", args=(self.book.id,))
+
+    def test_retrieve_book_from_cache(self) -> None:
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection=connection) as queries:
+            second = self.client.get(self.url)
+            self.assertEqual(len(queries), 0)
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(book_detail_cache.stats["misses"], 1)
+        self.assertEqual(book_detail_cache.stats["local_hits"], 1)
+
+    def test_retrieve_book_from_shared_cache(self) -> None:
+        self.client.get(self.url)
+        book_detail_cache.local.clear()
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["name"], "Test book 1")
+        self.assertEqual(book_detail_cache.stats["shared_hits"], 1)
+
+    def test_like_invalidates_cached_book(self) -> None:
+        self.assertEqual(self.client.get(self.url).data["annotated_likes"], 0)
+        UserBookRelation.objects.create(user=self.user, book=self.book, like=True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["annotated_likes"], 1)
+        self.assertEqual(response.data["readers"][0]["username"], "test_user")
+
+    def test_update_invalidates_cached_book(self) -> None:
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        self.client.patch(
+            self.url,
+            data=json.dumps({"price": "30.00"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(self.client.get(self.url).data["price"], "30.00")
+
+    def test_stale_local_entry_is_revalidated(self) -> None:
+        self.client.get(self.url)
+        book_detail_cache.invalidate(self.book.id)
+        book_detail_cache.local.set(self.book.id, {"name": "stale"}, 0)
+        book_detail_cache.local.get(self.book.id)["checked_at"] -= 10
+
+        self.assertEqual(self.client.get(self.url).data["name"], "Test book 1")
+
+
+class BookBatchApiTestCase(APITestCase):
+    def setUp(self):
+        self.books = [
+            Book.objects.create(name=f"Test book {i}", price="25", author_name="A")
+            for i in range(3)
+        ]
+        self.url = reverse("book-list")
+
+    def test_get_books_by_ids(self) -> None:
+        ids = [self.books[2].id, 999, self.books[0].id, self.books[2].id]
+        with CaptureQueriesContext(connection=connection) as queries:
+            response = self.client.get(self.url, data={"ids": ",".join(map(str, ids))})
+            self.assertEqual(len(queries), 2)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book["id"] for book in response.data["results"]],
+            [self.books[2].id, self.books[0].id],
+        )
+        self.assertEqual(response.data["missing"], [999])
+        self.assertEqual(
+            response.data["results"][0],
+            BookSerializer(BookViewSet.queryset.get(id=self.books[2].id)).data,
+        )
+
+    def test_get_books_by_invalid_ids(self) -> None:
+        response = self.client.get(self.url, data={"ids": "1,a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_books_by_too_many_ids(self) -> None:
+        ids = ",".join(str(i) for i in range(BookViewSet.batch_max_ids + 1))
+        response = self.client.get(self.url, data={"ids": ids})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookActivityApiTestCase(APITestCase):
+    def setUp(self):
+        # Requests must not cross an hour or a day boundary.
+        now = timezone.now().replace(hour=12, minute=30)
+        patcher = mock.patch("django.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = [User.objects.create_user(username=f"user {i}") for i in range(3)]
+        self.book1 = Book.objects.create(
+            name="Test book 1", price="25", author_name="Author 1"
+        )
+        self.book2 = Book.objects.create(
+            name="Test book 2", price="55", author_name="Author 5"
+        )
+        for user in self.users:
+            UserBookRelation.objects.create(user=user, book=self.book2, like=True)
+        relation = UserBookRelation.objects.create(
+            user=self.users[0], book=self.book1, in_bookmarks=True
+        )
+        relation.rating = 4
+        relation.save()
+
+    def test_get_trending_books(self) -> None:
+        response = self.client.get(reverse("book-trending"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "id": self.book2.id,
+                    "name": "Test book 2",
+                    "author_name": "Author 5",
+                    "likes": 3,
+                    "bookmarks": 0,
+                    "ratings": 0,
+                },
+                {
+                    "id": self.book1.id,
+                    "name": "Test book 1",
+                    "author_name": "Author 1",
+                    "likes": 0,
+                    "bookmarks": 1,
+                    "ratings": 1,
+                },
+            ],
+        )
+
+    def test_trending_ignores_old_activity(self) -> None:
+        BookActivity.objects.filter(book=self.book2).update(
+            bucket=timezone.now() - timedelta(days=10)
+        )
+        response = self.client.get(reverse("book-trending"), data={"days": 7})
+        self.assertEqual([book["id"] for book in response.data], [self.book1.id])
+
+    def test_get_book_activity(self) -> None:
+        url = reverse("book-activity", args=(self.book2.id,))
+        response = self.client.get(url, data={"period": "hour", "buckets": 24})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["likes"], 3)
+
+        relation = UserBookRelation.objects.get(user=self.users[0], book=self.book2)
+        relation.like = False
+        relation.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]["likes"], 2)
+
+    def test_deleted_relations_leave_activity(self) -> None:
+        url = reverse("book-activity", args=(self.book2.id,))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[0].delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book1.delete()
+
+        response = self.client.get(url, data={"period": "hour"})
+        self.assertEqual(response.data[0]["likes"], 2)
+        response = self.client.get(reverse("book-trending"))
+        self.assertEqual([book["likes"] for book in response.data], [2])
+
+    def test_get_activity_of_missing_book(self) -> None:
+        for book_id in ("abc", self.book2.id + 1):
+            response = self.client.get(f"/book/{book_id}/activity/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_book_activity_with_invalid_period(self) -> None:
+        url = reverse("book-activity", args=(self.book2.id,))
+        response = self.client.get(url, data={"period": "week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,82 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store import auth
+from store.models import Book
+
+
+class CachedAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test_user", password="pass")
+        self.book = Book.objects.create(name="Test", price="25", author_name="A")
+        self.client.force_login(self.user)
+        self.url = reverse("userbookrelation-detail", args=(self.book.id,))
+
+    def patch(self):
+        return self.client.patch(
+            self.url, data=json.dumps({"like": True}), content_type="application/json"
+        )
+
+    def auth_queries(self, queries):
+        return [
+            query["sql"]
+            for query in queries
+            if "auth_user" in query["sql"] or "django_session" in query["sql"]
+        ]
+
+    def test_warm_requests_skip_user_and_session_queries(self) -> None:
+        self.assertEqual(status.HTTP_200_OK, self.patch().status_code)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch()
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([], self.auth_queries(queries))
+        self.assertEqual(self.user.id, response.wsgi_request.user.id)
+        self.assertEqual("test_user", response.wsgi_request.user.username)
+
+    def test_user_change_invalidates_snapshot(self) -> None:
+        self.patch()
+        self.user.is_staff = True
+        self.user.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch()
+        self.assertTrue(response.wsgi_request.user.is_staff)
+        self.assertEqual(len(self.auth_queries(queries)), 1)
+
+    def test_snapshot_loaded_during_a_change_is_not_reused(self) -> None:
+        make_user_snapshot = auth.make_user_snapshot
+
+        def make_stale_snapshot(user):
+            snapshot = make_user_snapshot(user)
+            # The user changes while the request is loading it.
+            User.objects.filter(id=user.id).update(is_staff=True)
+            auth.invalidate_cached_user(user.id)
+            return snapshot
+
+        with mock.patch("store.auth.make_user_snapshot", make_stale_snapshot):
+            self.assertFalse(self.patch().wsgi_request.user.is_staff)
+        self.assertTrue(self.patch().wsgi_request.user.is_staff)
+
+    def test_password_change_logs_out(self) -> None:
+        self.patch()
+        self.user.set_password("new_pass")
+        self.user.save()
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.patch().status_code)
+
+    def test_inactive_user_is_anonymous(self) -> None:
+        self.patch()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, self.patch().status_code)
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.autocomplete import autocomplete_index, index_keys, normalize
+from store.models import Book, UserBookRelation
+
+
+class NormalizeTestCase(SimpleTestCase):
+    def test_normalize(self) -> None:
+        self.assertEqual(normalize("  Les  Misérables "), "les miserables")
+
+    def test_index_keys(self) -> None:
+        self.assertEqual(
+            index_keys("Harry Potter", "J. K. Rowling"),
+            {"harry potter", "potter", "j. k. rowling", "k. rowling", "rowling"},
+        )
+
+
+class AutocompleteApiTestCase(APITestCase):
+    def setUp(self):
+        autocomplete_index.clear()
+        autocomplete_index.refresh_interval = 0
+        self.addCleanup(setattr, autocomplete_index, "refresh_interval", 1)
+        self.user = User.objects.create_user(username="test_user")
+        self.book1 = Book.objects.create(
+            name="Harry Potter", price="25", author_name="J. K. Rowling"
+        )
+        self.book2 = Book.objects.create(
+            name="The Hobbit", price="25", author_name="J. R. R. Tolkien"
+        )
+        self.book3 = Book.objects.create(
+            name="Hamlet", price="25", author_name="William Shakespeare"
+        )
+        UserBookRelation.objects.create(user=self.user, book=self.book3, like=True)
+        self.url = reverse("book-autocomplete")
+
+    def search(self, query):
+        response = self.client.get(self.url, data={"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in response.data]
+
+    def test_autocomplete_ranked_by_likes(self) -> None:
+        self.assertEqual(self.search("Ha"), [self.book3.id, self.book1.id])
+        self.assertEqual(self.search("tolk"), [self.book2.id])
+        self.assertEqual(self.search("pott"), [self.book1.id])
+        self.assertEqual(self.search("xyz"), [])
+
+    def test_autocomplete_without_queries(self) -> None:
+        self.search("h")
+        with CaptureQueriesContext(connection=connection) as queries:
+            self.search("ho")
+            self.assertEqual(len(queries), 0)
+
+    def test_autocomplete_updated_on_changes(self) -> None:
+        self.search("h")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book1.name = "Hobbit Companion"
+            self.book1.save()
+            Book.objects.create(name="Holes", price="25", author_name="Sachar")
+        self.assertEqual(self.search("hobb"), [self.book1.id, self.book2.id])
+        self.assertEqual(self.search("harry"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book2.delete()
+        self.assertEqual(self.search("hobb"), [self.book1.id])
+
+    def test_autocomplete_ranks_every_match(self) -> None:
+        Book.objects.bulk_create(
+            Book(name=f"a{i:05}", price="25", author_name="Author") for i in range(6000)
+        )
+        best = Book.objects.create(
+            name="azzzz", price="25", author_name="Author", likes_count=1000
+        )
+        autocomplete_index.clear()
+        self.assertEqual(self.search("a")[0], best.id)
+
+    def test_rebuild_runs_once_in_background(self) -> None:
+        self.search("h")
+        autocomplete_index.max_age = 0
+        self.addCleanup(setattr, autocomplete_index, "max_age", 300)
+        self.addCleanup(setattr, autocomplete_index, "_building", False)
+        with mock.patch("store.autocomplete.threading.Thread") as thread:
+            self.search("h")
+            # The previous index keeps serving while the rebuild runs.
+            self.assertEqual(self.search("Ha"), [self.book3.id, self.book1.id])
+        thread.assert_called_once()
@@ -0,0 +1,177 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store.budgets import QueryBudget
+from store.cache import book_detail_cache
+from store.models import Book, SimilarBook, UserBookRelation
+from store.tests.utils import QueryBudgetTestMixin
+from store.views import BookViewSet, UserBookRelationalView
+
+
+class QueryBudgetTestCase(QueryBudgetTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        book_detail_cache.clear()
+        self.user = User.objects.create_user(
+            username="test_user", password="test_password"
+        )
+        self.book = Book.objects.create(name="Book", price="25", author_name="A")
+        self.seeded = 0
+
+    def seed(self, count):
+        for _ in range(count):
+            self.seeded += 1
+            reader = User.objects.create_user(username=f"reader {self.seeded}")
+            book = Book.objects.create(
+                name=f"Book {self.seeded}", price="25", author_name="A"
+            )
+            UserBookRelation.objects.create(user=reader, book=book, like=True, rating=4)
+            UserBookRelation.objects.create(
+                user=reader, book=self.book, like=True, rating=5
+            )
+            SimilarBook.objects.create(book=self.book, similar_book=book, score=1)
+
+    def test_book_list(self) -> None:
+        self.assertQueryBudget(
+            BookViewSet,
+            "list",
+            lambda: self.client.get(reverse("book-list")),
+            self.seed,
+        )
+
+    def test_book_retrieve(self) -> None:
+        def retrieve():
+            book_detail_cache.clear()
+            cache.clear()
+            return self.client.get(reverse("book-detail", args=(self.book.id,)))
+
+        self.assertQueryBudget(BookViewSet, "retrieve", retrieve, self.seed)
+
+    def test_book_retrieve_from_snapshot(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        def seed(count):
+            self.seed(count)
+            call_command("build_catalog_snapshot", stdout=StringIO())
+
+        def retrieve():
+            book_detail_cache.invalidate(self.book.id)
+            return self.client.get(
+                reverse("book-detail", args=(self.book.id,)),
+                HTTP_ACCEPT="application/json",
+            )
+
+        with self.settings(CATALOG_SNAPSHOT_ROOT=tmp_dir.name):
+            self.assertQueryBudget(BookViewSet, "retrieve", retrieve, seed)
+            self.assertTrue(retrieve().streaming)
+
+    def test_book_retrieve_from_stale_snapshot(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        def retrieve():
+            book_detail_cache.invalidate(self.book.id)
+            return self.client.get(
+                reverse("book-detail", args=(self.book.id,)),
+                HTTP_ACCEPT="application/json",
+            )
+
+        with self.settings(CATALOG_SNAPSHOT_ROOT=tmp_dir.name):
+            call_command("build_catalog_snapshot", stdout=StringIO())
+            # Every seeded relation changes the book past the snapshot.
+            self.assertQueryBudget(BookViewSet, "retrieve", retrieve, self.seed)
+            self.assertFalse(retrieve().streaming)
+
+    def test_book_changes(self) -> None:
+        self.assertQueryBudget(
+            BookViewSet,
+            "changes",
+            lambda: self.client.get(reverse("book-changes")),
+            self.seed,
+        )
+
+    def test_book_similar(self) -> None:
+        self.assertQueryBudget(
+            BookViewSet,
+            "similar",
+            lambda: self.client.get(reverse("book-similar", args=(self.book.id,))),
+            self.seed,
+        )
+
+    def test_book_trending(self) -> None:
+        self.assertQueryBudget(
+            BookViewSet,
+            "trending",
+            lambda: self.client.get(reverse("book-trending"), {"limit": 50}),
+            self.seed,
+        )
+
+    def test_book_activity(self) -> None:
+        self.assertQueryBudget(
+            BookViewSet,
+            "activity",
+            lambda: self.client.get(
+                reverse("book-activity", args=(self.book.id,)), {"period": "hour"}
+            ),
+            self.seed,
+        )
+
+    def test_relation_partial_update(self) -> None:
+        UserBookRelation.objects.create(user=self.user, book=self.book)
+        self.client.force_login(self.user)
+        rating = iter(range(1, 6))
+
+        def rate():
+            return self.client.patch(
+                reverse("userbookrelation-detail", args=(self.book.id,)),
+                data=json.dumps({"like": True, "rating": next(rating)}),
+                content_type="application/json",
+            )
+
+        # Warm the cached session user up, steady-state requests don't load it.
+        rate()
+        self.assertQueryBudget(
+            UserBookRelationalView, "partial_update", rate, self.seed
+        )
+
+    def test_relation_partial_update_creating_relation(self) -> None:
+        self.client.force_login(self.user)
+        books = iter(
+            [
+                Book.objects.create(name=f"New {i}", price="25", author_name="A")
+                for i in range(len(self.dataset_sizes) + 1)
+            ]
+        )
+
+        def like():
+            return self.client.patch(
+                reverse("userbookrelation-detail", args=(next(books).id,)),
+                data=json.dumps({"like": True}),
+                content_type="application/json",
+            )
+
+        like()
+        self.assertQueryBudget(
+            UserBookRelationalView, "partial_update", like, self.seed
+        )
+
+    @override_settings(QUERY_BUDGETS_ENABLED=True)
+    def test_exceeded_budget_is_logged(self) -> None:
+        budgets = {"list": QueryBudget(queries=1)}
+        with self.settings(DEBUG=True), self.assertLogs("store.budgets") as logs:
+            BookViewSet.query_budgets, original = budgets, BookViewSet.query_budgets
+            try:
+                self.client.get(reverse("book-list"))
+            finally:
+                BookViewSet.query_budgets = original
+
+        self.assertIn("BookViewSet.list exceeded its query budget", logs.output[0])
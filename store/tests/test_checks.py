@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase, override_settings
+
+from store.checks import check_shared_cache
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_process_local_cache_warns(self) -> None:
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)], ["store.W001"]
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": "127.0.0.1:11211",
+            }
+        }
+    )
+    def test_shared_cache_passes(self) -> None:
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,189 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+import brotli
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from store.logic import activity_bucket
+from store.models import Book, BookActivity, ImportProgress, UserBookRelation
+from store.serializers import BookSerializer
+from store.views import BookViewSet
+
+
+class ImportBooksCommandTestCase(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username="user1")
+        self.user2 = User.objects.create_user(username="user2")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        return path
+
+    def import_file(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_books", path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_books_from_csv(self):
+        path = self.write_file(
+            "books.csv",
+            "id,name,price,author_name,owner\n"
+            "10,Book 1,25.00,Author 1,user1\n"
+            "11,Book 2,invalid,Author 2,\n"
+            "12,Book 3,55.50,Author 3,unknown\n"
+            "13,Book 4,15,Author 4,\n",
+        )
+        stdout, stderr = self.import_file(path, batch_size=2)
+
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("id", "owner__username")),
+            [(10, "user1"), (13, None)],
+        )
+        self.assertIn("Row 2", stderr)
+        self.assertIn("Row 3", stderr)
+        self.assertIn("Imported 2 books, skipped 2 invalid rows", stdout)
+        versions = Book.objects.values_list("change_version", flat=True)
+        self.assertEqual(len(set(versions)), 2)
+
+    def test_import_relations_from_jsonl(self):
+        book = Book.objects.create(name="Book", price="25", author_name="Author")
+        rows = [
+            {"user": "user1", "book": book.id, "like": True, "rating": 5},
+            {"user": "user2", "book": book.id, "in_bookmarks": True, "rating": 4},
+            {"user": "user2", "book": 999, "like": True},
+        ]
+        path = self.write_file(
+            "relations.jsonl", "\n".join(json.dumps(row) for row in rows)
+        )
+        version = Book.objects.get(id=book.id).change_version
+        stdout, stderr = self.import_file(path, kind="relations")
+
+        self.assertEqual(UserBookRelation.objects.count(), 2)
+        self.assertIn("Unknown book id", stderr)
+        book.refresh_from_db()
+        self.assertEqual(str(book.rating), "4.50")
+        self.assertGreater(book.change_version, version)
+
+    def test_resume_import(self):
+        path = self.write_file(
+            "books.jsonl",
+            "\n".join(
+                json.dumps({"name": f"Book {i}", "price": "10", "author_name": "A"})
+                for i in range(5)
+            ),
+        )
+        ImportProgress.objects.create(key=path, rows=3)
+        self.import_file(path, resume=True)
+
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("name", flat=True)),
+            ["Book 3", "Book 4"],
+        )
+        self.assertEqual(ImportProgress.objects.get(key=path).rows, 5)
+
+    def test_reimport_relations_skips_existing_pairs(self):
+        book = Book.objects.create(name="Les Misérables", price="25", author_name="A")
+        rows = [
+            {"user": "user1", "book": book.id, "like": True},
+            {"user": "user1", "book": book.id, "rating": 3},
+            {"user": "user2", "book": book.id, "like": True},
+        ]
+        path = self.write_file(
+            "relations.jsonl", "\n".join(json.dumps(row) for row in rows)
+        )
+        self.import_file(path, kind="relations")
+        stdout, stderr = self.import_file(path, kind="relations")
+
+        self.assertEqual(UserBookRelation.objects.count(), 2)
+        self.assertIn("Imported 0 relations, skipped 3 invalid rows", stdout)
+        self.assertIn("The relation already exists", stderr)
+        self.assertEqual(Book.objects.get(id=book.id).likes_count, 2)
+
+    def test_reimport_books_skips_existing_ids(self):
+        path = self.write_file(
+            "books.csv",
+            "id,name,price,author_name,owner\n"
+            "10,Book 1,25.00,Author 1,user1\n"
+            "11,Book 2,15,Author 2,\n"
+            "11,Book 2 again,15,Author 2,\n",
+        )
+        stdout, stderr = self.import_file(path)
+        self.assertIn("Imported 2 books, skipped 1 invalid rows", stdout)
+
+        stdout, stderr = self.import_file(path)
+        self.assertIn("Imported 0 books, skipped 3 invalid rows", stdout)
+        self.assertIn("The book already exists", stderr)
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("name", flat=True)),
+            ["Book 1", "Book 2"],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL COPY.")
+    def test_copy_relations(self):
+        book = Book.objects.create(name="Book", price="25", author_name="Author")
+        rows = [
+            {"user": "user1", "book": book.id, "like": True},
+            {"user": "user2", "book": book.id, "rating": 4},
+        ]
+        path = self.write_file(
+            "relations.jsonl", "\n".join(json.dumps(row) for row in rows)
+        )
+        self.import_file(path, kind="relations", copy=True)
+
+        relations = UserBookRelation.objects.filter(book=book)
+        self.assertEqual(relations.count(), 2)
+        self.assertFalse(relations.filter(created_at__isnull=True).exists())
+        self.assertEqual(Book.objects.get(id=book.id).likes_count, 1)
+
+
+class CompactActivityCommandTestCase(TestCase):
+    def test_old_hourly_rollups_are_deleted(self):
+        book = Book.objects.create(name="Book", price="25", author_name="Author")
+        now = timezone.now()
+        for period in (BookActivity.HOUR, BookActivity.DAY):
+            for days in (0, 10):
+                BookActivity.objects.create(
+                    book=book,
+                    period=period,
+                    bucket=activity_bucket(period, now - timedelta(days=days)),
+                    likes=1,
+                )
+
+        call_command("compact_activity", stdout=StringIO())
+        self.assertEqual(
+            sorted(BookActivity.objects.values_list("period", flat=True)),
+            ["day", "day", "hour"],
+        )
+
+
+class BenchmarkFormatsCommandTestCase(TestCase):
+    @override_settings(RESPONSE_COMPRESSION_BROTLI_QUALITY=11)
+    def test_sizes_match_served_compression(self):
+        for i in range(5):
+            Book.objects.create(name=f"Book {i}", price="25", author_name="Author")
+        stdout = StringIO()
+        call_command("benchmark_formats", repeat=1, stdout=stdout)
+
+        content = JSONRenderer().render(
+            BookSerializer(BookViewSet.queryset.all(), many=True).data
+        )
+        name, size, gzip_size, br_size = stdout.getvalue().splitlines()[2].split()[:4]
+        self.assertEqual(name, "json")
+        self.assertEqual(int(size), len(content))
+        self.assertEqual(int(gzip_size), len(compress_string(content)))
+        self.assertEqual(int(br_size), len(brotli.compress(content, quality=11)))
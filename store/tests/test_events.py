@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from store.events import Broadcaster, LocalBackend, book_events, broadcaster
+from store.models import Book, UserBookRelation
+
+
+class BroadcasterTestCase(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(username="user1")
+        self.user2 = User.objects.create_user(username="user2")
+        self.book = Book.objects.create(name="Book", price="25", author_name="A")
+
+    async def test_changes_are_coalesced_per_book(self):
+        events = Broadcaster(LocalBackend(), interval=60)
+        queue = events.subscribe()
+        events.publish(self.book.id)
+        events.publish(self.book.id)
+        await sync_to_async(Book.objects.filter(id=self.book.id).update)(
+            likes_count=2, rating="4.50"
+        )
+        await events.flush()
+
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(
+            queue.get_nowait(), {"book": self.book.id, "likes": 2, "rating": "4.50"}
+        )
+        events.unsubscribe(queue)
+
+    async def test_slow_listener_drops_oldest_events(self):
+        events = Broadcaster(LocalBackend(), interval=60, queue_size=1)
+        queue = events.subscribe()
+        for _ in range(2):
+            events.publish(self.book.id)
+            await events.flush()
+
+        self.assertEqual(queue.qsize(), 1)
+        events.unsubscribe(queue)
+
+    def test_changes_without_listeners_are_not_kept(self):
+        events = Broadcaster(LocalBackend(), interval=60)
+        events.publish(self.book.id)
+        self.assertEqual(asyncio.run(events.backend.drain()), set())
+
+    async def test_stream_relation_changes(self):
+        messages = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message.get("body", b"").startswith(b"event:"):
+                disconnect.set()
+
+        stream = asyncio.ensure_future(book_events({"type": "http"}, receive, send))
+        await asyncio.sleep(0)
+        await sync_to_async(self.like_book)()
+        await broadcaster.flush()
+        await asyncio.wait_for(stream, timeout=5)
+
+        self.assertEqual(messages[0]["status"], 200)
+        event, data = messages[1]["body"].decode().splitlines()[:2]
+        self.assertEqual(event, "event: book")
+        self.assertEqual(
+            json.loads(data.removeprefix("data: ")),
+            {"book": self.book.id, "likes": 2, "rating": None},
+        )
+        self.assertFalse(broadcaster.listeners)
+
+    def like_book(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in (self.user1, self.user2):
+                UserBookRelation.objects.create(user=user, book=self.book, like=True)
@@ -1,7 +1,9 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from store.logic import set_rating
+from store.logic import next_change_version, recompute_book_aggregates, set_rating
 from store.models import Book, UserBookRelation
 
 
@@ -35,3 +37,82 @@ class SetRatingTestCase(TestCase):
     def test_set_rating_success(self):
         set_rating(self.book1)
         self.assertEqual(str(Book.objects.get(id=self.book1.id).rating), "4.67")
+
+    def test_rating_updated_on_relation_save(self):
+        relation = UserBookRelation.objects.get(user__username="user3", book=self.book1)
+        relation.rating = 5
+        relation.save()
+        self.assertEqual(str(Book.objects.get(id=self.book1.id).rating), "5.00")
+
+    def test_change_version_bumped_on_like(self):
+        version = Book.objects.get(id=self.book1.id).change_version
+        relation = UserBookRelation.objects.get(user__username="user1", book=self.book1)
+        relation.like = False
+        relation.save()
+        self.assertGreater(Book.objects.get(id=self.book1.id).change_version, version)
+
+    def test_rating_distribution_maintained(self):
+        book = Book.objects.get(id=self.book1.id)
+        self.assertEqual(book.rating_distribution, {1: 0, 2: 0, 3: 0, 4: 1, 5: 2})
+
+        relation = UserBookRelation.objects.get(user__username="user3", book=self.book1)
+        relation.rating = 2
+        relation.save()
+        relation = UserBookRelation.objects.get(user__username="user2", book=self.book1)
+        relation.rating = None
+        relation.save()
+
+        book = Book.objects.get(id=self.book1.id)
+        self.assertEqual(book.rating_distribution, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(str(book.rating), "3.50")
+
+        UserBookRelation.objects.filter(book=self.book1).delete()
+        book = Book.objects.get(id=self.book1.id)
+        self.assertEqual(book.rating_distribution, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertIsNone(book.rating)
+
+
+class RecomputeBookAggregatesTestCase(TestCase):
+    def test_recompute_in_batches(self):
+        user = User.objects.create_user(username="test_user")
+        books = [
+            Book.objects.create(name=f"Book {i}", price="25", author_name="A")
+            for i in range(5)
+        ]
+        for book in books:
+            UserBookRelation.objects.create(user=user, book=book, like=True, rating=4)
+        Book.objects.update(likes_count=0, rating=None)
+        version = next_change_version(0)
+
+        recompute_book_aggregates([book.id for book in books] + [10_000_000], 2)
+
+        self.assertEqual(next_change_version(0), version + 6)
+        recomputed = Book.objects.order_by("id")
+        self.assertEqual({book.likes_count for book in recomputed}, {1})
+        self.assertEqual({str(book.rating) for book in recomputed}, {"4.00"})
+        self.assertEqual(
+            [book.change_version for book in recomputed],
+            list(range(version + 1, version + 6)),
+        )
+
+
+class BookDeletionTestCase(TestCase):
+    def delete_queries(self, relations):
+        book = Book.objects.create(name="Book", price="25", author_name="A")
+        for i in range(relations):
+            user = User.objects.create_user(username=f"user {relations} {i}")
+            UserBookRelation.objects.create(user=user, book=book, like=True, rating=4)
+        with CaptureQueriesContext(connection) as queries:
+            book.delete()
+        return len(queries)
+
+    def test_delete_book_query_count_is_constant(self):
+        self.assertEqual(self.delete_queries(1), self.delete_queries(20))
+
+    def test_relations_deleted_afterwards_update_aggregates(self):
+        self.delete_queries(1)
+        user = User.objects.create_user(username="test_user")
+        book = Book.objects.create(name="Other", price="25", author_name="A")
+        relation = UserBookRelation.objects.create(user=user, book=book, like=True)
+        relation.delete()
+        self.assertEqual(Book.objects.get(id=book.id).likes_count, 0)
@@ -0,0 +1,103 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from store.filters import BookOrderingFilter
+from store.models import Book, UserBookRelation
+from store.views import BookViewSet
+
+
+class BookOrderingApiTestCase(APITestCase):
+    def setUp(self):
+        users = [User.objects.create_user(username=f"user {i}") for i in range(3)]
+        self.book1 = Book.objects.create(name="Book 1", price="25", author_name="A")
+        self.book2 = Book.objects.create(name="Book 2", price="55", author_name="B")
+        self.book3 = Book.objects.create(name="Book 3", price="15", author_name="C")
+        self.book4 = Book.objects.create(name="Book 4", price="35", author_name="D")
+        for user in users:
+            UserBookRelation.objects.create(
+                user=user, book=self.book2, like=True, rating=3
+            )
+        UserBookRelation.objects.create(user=users[0], book=self.book3, rating=5)
+        UserBookRelation.objects.create(user=users[0], book=self.book4, like=True)
+        self.url = reverse("book-list")
+
+    def get_ids(self, ordering):
+        response = self.client.get(self.url, data={"ordering": ordering})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in response.data]
+
+    def test_order_by_rating(self) -> None:
+        self.assertEqual(
+            self.get_ids("rating"),
+            [self.book2.id, self.book3.id, self.book1.id, self.book4.id],
+        )
+        self.assertEqual(
+            self.get_ids("-rating"),
+            [self.book3.id, self.book2.id, self.book4.id, self.book1.id],
+        )
+
+    def test_order_by_likes(self) -> None:
+        self.assertEqual(
+            self.get_ids("-likes"),
+            [self.book2.id, self.book4.id, self.book3.id, self.book1.id],
+        )
+
+    def test_likes_count_maintained(self) -> None:
+        relation = UserBookRelation.objects.get(book=self.book4)
+        relation.like = False
+        relation.save()
+        UserBookRelation.objects.filter(book=self.book2).first().delete()
+
+        self.assertEqual(
+            dict(Book.objects.values_list("id", "likes_count")),
+            {self.book1.id: 0, self.book2.id: 2, self.book3.id: 0, self.book4.id: 0},
+        )
+
+
+class BookOrderingExplainTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.bulk_create(
+            Book(
+                name=f"Book {i}",
+                price=i % 100,
+                author_name=f"Author {i % 50}",
+                rating=None if i % 3 else i % 5,
+                likes_count=i % 40,
+            )
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def explain(self, ordering):
+        request = Request(APIRequestFactory().get("/", {"ordering": ordering}))
+        queryset = BookOrderingFilter().filter_queryset(
+            request, Book.objects.only("id"), BookViewSet()
+        )[:20]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_sort = off")
+        return queryset.explain()
+
+    def test_order_by_likes_uses_index(self) -> None:
+        self.assertIn("book_likes_count_idx", self.explain("-likes"))
+        self.assertIn("book_likes_count_idx", self.explain("likes"))
+
+    def test_order_by_price_uses_index(self) -> None:
+        self.assertIn("book_price_idx", self.explain("price"))
+
+    def test_order_by_author_name_uses_index(self) -> None:
+        self.assertIn("book_author_name_idx", self.explain("-author_name"))
+
+    @skipUnless(connection.vendor == "postgresql", "Needs NULLS LAST indexes.")
+    def test_order_by_rating_uses_index(self) -> None:
+        self.assertIn("book_rating_idx", self.explain("rating"))
+        self.assertIn("book_rating_desc_idx", self.explain("-rating"))
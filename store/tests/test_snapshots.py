@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.cache import book_detail_cache
+from store.models import Book, UserBookRelation
+
+
+class CatalogSnapshotApiTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        book_detail_cache.clear()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(CATALOG_SNAPSHOT_ROOT=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = tmp_dir.name
+
+        self.user = User.objects.create_user(username="test_user")
+        self.book1 = Book.objects.create(
+            name="Test book 1", price="25", author_name="Author 1", owner=self.user
+        )
+        self.book2 = Book.objects.create(
+            name="Test book 2", price="55", author_name="Author 5"
+        )
+        UserBookRelation.objects.create(user=self.user, book=self.book1, like=True)
+
+    def build(self, **options):
+        call_command("build_catalog_snapshot", stdout=StringIO(), **options)
+
+    def get(self, url, **extra):
+        return self.client.get(url, HTTP_ACCEPT="application/json", **extra)
+
+    def test_snapshot_matches_live_rendering(self) -> None:
+        live_list = self.get(reverse("book-list")).content
+        live_detail = self.get(reverse("book-detail", args=(self.book1.id,))).content
+        book_detail_cache.invalidate(self.book1.id)
+        self.build(chunk_size=1)
+
+        response = self.get(reverse("book-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), live_list)
+
+        response = self.get(reverse("book-detail", args=(self.book1.id,)))
+        self.assertEqual(b"".join(response.streaming_content), live_detail)
+
+    def test_snapshot_detail_fills_the_cache(self) -> None:
+        self.build()
+        url = reverse("book-detail", args=(self.book1.id,))
+        with self.assertNumQueries(1):
+            response = self.get(url)
+        self.assertTrue(response.streaming)
+        snapshot = json.loads(b"".join(response.streaming_content))
+
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data, snapshot)
+
+    def test_precompressed_snapshot(self) -> None:
+        self.build()
+        response = self.get(reverse("book-list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        data = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+        self.assertEqual([book["id"] for book in data], [self.book1.id, self.book2.id])
+
+    def test_filtered_and_authenticated_requests_are_live(self) -> None:
+        self.build()
+        response = self.get(reverse("book-list"), data={"price": 55})
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data), 1)
+
+        self.client.force_login(self.user)
+        self.assertFalse(self.get(reverse("book-list")).streaming)
+
+    def test_new_book_falls_back_to_live(self) -> None:
+        self.build()
+        book = Book.objects.create(name="New", price="10", author_name="Author")
+        response = self.get(reverse("book-detail", args=(book.id,)))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data["name"], "New")
+
+    def test_changed_and_deleted_books_fall_back_to_live(self) -> None:
+        self.build()
+        self.book1.name = "Renamed"
+        self.book1.save()
+        response = self.get(reverse("book-detail", args=(self.book1.id,)))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data["name"], "Renamed")
+
+        book_id = self.book2.id
+        self.book2.delete()
+        response = self.get(reverse("book-detail", args=(book_id,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(CATALOG_SNAPSHOT_MAX_AGE=0)
+    def test_expired_snapshot_is_not_served(self) -> None:
+        self.build()
+        self.assertFalse(self.get(reverse("book-list")).streaming)
+
+    def test_old_snapshots_are_pruned(self) -> None:
+        for _ in range(3):
+            self.build(keep=2)
+        self.assertEqual(len(os.listdir(self.root)), 3)
+
+        with self.assertRaises(CommandError):
+            self.build(keep=0)
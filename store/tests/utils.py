@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetTestMixin:
+    """
+    A test case mixin checking a viewset action against its query budget.
+
+    Attributes:
+        dataset_sizes (tuple): The dataset sizes the action is measured at.
+    """
+
+    dataset_sizes = (1, 10, 50)
+
+    def assertQueryBudget(self, view_class, action, make_request, seed):
+        """
+        Asserts an action stays within its query budget with a constant query count.
+
+        Args:
+            view_class: The viewset declaring the budget.
+            action: The name of the action.
+            make_request: Performs the request and returns the response.
+            seed: Adds the given number of rows to the dataset.
+        """
+        budget = view_class.query_budgets[action]
+        counts = {}
+        seeded = 0
+        for size in self.dataset_sizes:
+            seed(size - seeded)
+            seeded = size
+            with CaptureQueriesContext(connection=connection) as queries:
+                response = make_request()
+            self.assertLess(response.status_code, 400, getattr(response, "data", None))
+
+            # Time budgets are only checked at runtime, wall-clock SQL time
+            # is too noisy on shared test machines.
+            self.assertLessEqual(
+                len(queries),
+                budget.queries,
+                f"{view_class.__name__}.{action} ran {len(queries)} queries "
+                f"with {size} rows, budget is {budget!r}",
+            )
+            counts[size] = len(queries)
+
+        self.assertEqual(
+            len(set(counts.values())),
+            1,
+            f"{view_class.__name__}.{action} query count grows: {counts}",
+        )
@@ -1,17 +1,88 @@
-from django.db.models import Case, Count, When
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, prefetch_related_objects
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
-from store.models import Book, UserBookRelation
+from store.autocomplete import autocomplete_index
+from store.budgets import QueryBudget, QueryBudgetMixin
+from store.cache import book_detail_cache
+from store.filters import BookOrderingFilter
+from store.logic import activity_bucket, get_changes
+from store.models import Book, BookActivity, SimilarBook, UserBookRelation
 from store.permissions import IsOwnerOrStaffOrReadOnly
-from store.serializers import BookSerializer, UserBookRelationSerializer
+from store.serializers import (
+    BookActivitySerializer,
+    BookSerializer,
+    SimilarBookSerializer,
+    UserBookRelationSerializer,
+)
+from store.snapshots import snapshot_document, snapshot_response
+
+
+def get_int_param(request, name, default, minimum):
+    """
+    Reads an integer query parameter or raises a validation error.
+
+    Args:
+        request: The request to read the parameter from.
+        name: The name of the query parameter.
+        default: The value used when the parameter is missing.
+        minimum: The smallest accepted value.
+
+    Returns:
+        int: The parsed value.
+    """
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+    if value < minimum:
+        raise ValidationError(
+            {name: f"Ensure this value is greater than or equal to {minimum}."}
+        )
+    return value
+
+
+def get_ids_param(request, name, max_length):
+    """
+    Reads a comma separated list of ids, dropping duplicates but keeping order.
 
+    Args:
+        request: The request to read the parameter from.
+        name: The name of the query parameter.
+        max_length: The maximum number of ids accepted.
 
-class BookViewSet(viewsets.ModelViewSet):
+    Returns:
+        list[int]: The parsed ids.
+    """
+    try:
+        ids = list(
+            dict.fromkeys(
+                int(value) for value in request.query_params[name].split(",") if value
+            )
+        )
+    except ValueError:
+        raise ValidationError({name: "A comma separated list of ids is required."})
+    if not ids or len(ids) > max_length:
+        raise ValidationError(
+            {name: f"Ensure this list has between 1 and {max_length} ids."}
+        )
+    return ids
+
+
+class BookViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     queryset = (
         Book.objects.all()
-        .annotate(annotated_likes=Count(Case(When(books__like=True, then=1))))
+        .annotate(annotated_likes=F("likes_count"))
         .select_related("owner")
         .prefetch_related("readers")
         .order_by("id")
@@ -21,18 +92,219 @@ class BookViewSet(viewsets.ModelViewSet):
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
-        filters.OrderingFilter,
+        BookOrderingFilter,
     ]
     filterset_fields = ("price",)
     search_fields = ("author_name", "name")
-    ordering_fields = ("price", "author_name")
+    ordering_fields = ("price", "author_name", "rating", "likes")
+    changes_page_size = 500
+    batch_max_ids = 100
+    autocomplete_max_limit = 20
+    trending_max_days = 30
+    trending_max_limit = 50
+    activity_max_buckets = {BookActivity.HOUR: 168, BookActivity.DAY: 365}
+    query_budgets = {
+        "list": QueryBudget(queries=2, time_ms=100),
+        "retrieve": QueryBudget(queries=2, time_ms=50),
+        "changes": QueryBudget(queries=2, time_ms=50),
+        "similar": QueryBudget(queries=2, time_ms=50),
+        "trending": QueryBudget(queries=1, time_ms=50),
+        "activity": QueryBudget(queries=2, time_ms=50),
+    }
+
+    def get_snapshot_document(self, request, name, change_version=None):
+        """
+        Returns the path of a pre-rendered snapshot document for anonymous,
+        unfiltered JSON requests, or None when the request must be rendered live.
+        """
+        if (
+            request.user.is_authenticated
+            or request.query_params
+            or request.accepted_renderer.format != "json"
+        ):
+            return None
+        return snapshot_document(name, change_version)
+
+    def get_book_id(self):
+        """
+        Returns the id of the book of a detail action, without fetching it.
+
+        Raises:
+            Http404: If the lookup is not a valid book id.
+        """
+        book_id = self.kwargs[self.lookup_field]
+        if not book_id.isdigit():
+            raise Http404
+        return int(book_id)
+
+    def check_book_exists(self, book_id):
+        """
+        Raises Http404 if the book does not exist.
+
+        Args:
+            book_id: The id of the book.
+        """
+        if not Book.objects.filter(pk=book_id).exists():
+            raise Http404
+
+    def list(self, request, *args, **kwargs):
+        document = self.get_snapshot_document(request, "list.json")
+        if document is not None:
+            return snapshot_response(request, document)
+        if "ids" not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        ids = get_ids_param(request, "ids", self.batch_max_ids)
+        books = {book.id: book for book in self.get_queryset().filter(id__in=ids)}
+        serializer = self.get_serializer(
+            [books[book_id] for book_id in ids if book_id in books], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [book_id for book_id in ids if book_id not in books],
+            }
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        book_id = kwargs[self.lookup_field]
+        if not book_id.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        data, version = book_detail_cache.get(book_id)
+        if data is not None:
+            return Response(data)
+        # The change version of the book tells whether its snapshot document is
+        # current, so the readers are only fetched when rendering live.
+        book = get_object_or_404(
+            self.filter_queryset(self.get_queryset()).prefetch_related(None),
+            pk=book_id,
+        )
+        self.check_object_permissions(request, book)
+        document = self.get_snapshot_document(
+            request, f"books/{book_id}.json", book.change_version
+        )
+        if document is not None:
+            book_detail_cache.set(book_id, json.loads(document.read_bytes()), version)
+            return snapshot_response(request, document)
+        prefetch_related_objects([book], "readers")
+        data = self.get_serializer(book).data
+        book_detail_cache.set(book_id, data, version)
+        return Response(data)
 
     def perform_create(self, serializer) -> None:
         user = self.request.user
         serializer.save(owner=user)
 
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """
+        Returns the book detail cache counters of the serving process.
+        """
+        return Response(book_detail_cache.stats)
+
+    @action(detail=False)
+    def changes(self, request):
+        """
+        Returns the ids of books changed or deleted after the ``since`` cursor.
+        """
+        since = get_int_param(request, "since", default=0, minimum=0)
+        limit = get_int_param(
+            request, "limit", default=self.changes_page_size, minimum=1
+        )
+        return Response(get_changes(since, min(limit, self.changes_page_size)))
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        """
+        Returns the best ranked books whose title or author match the ``q`` prefix.
+        """
+        limit = get_int_param(request, "limit", default=10, minimum=1)
+        return Response(
+            autocomplete_index.search(
+                request.query_params.get("q", ""),
+                min(limit, self.autocomplete_max_limit),
+            )
+        )
+
+    @action(detail=False)
+    def trending(self, request):
+        """
+        Returns the books with the most activity over the last ``days`` days.
+        """
+        days = get_int_param(request, "days", default=7, minimum=1)
+        limit = get_int_param(request, "limit", default=10, minimum=1)
+        since = activity_bucket(BookActivity.DAY) - timedelta(
+            days=min(days, self.trending_max_days) - 1
+        )
+        books = (
+            BookActivity.objects.filter(period=BookActivity.DAY, bucket__gte=since)
+            .values("book", "book__name", "book__author_name")
+            .annotate(
+                likes=Sum("likes"),
+                bookmarks=Sum("bookmarks"),
+                ratings=Sum("ratings"),
+                score=F("likes") + F("bookmarks") + F("ratings"),
+            )
+            .order_by("-score", "book")[: min(limit, self.trending_max_limit)]
+        )
+        return Response(
+            [
+                {
+                    "id": book["book"],
+                    "name": book["book__name"],
+                    "author_name": book["book__author_name"],
+                    "likes": book["likes"],
+                    "bookmarks": book["bookmarks"],
+                    "ratings": book["ratings"],
+                }
+                for book in books
+            ]
+        )
+
+    @action(detail=True)
+    def activity(self, request, pk=None):
+        """
+        Returns the hourly or daily activity of a book, oldest bucket first.
+        """
+        period = request.query_params.get("period", BookActivity.DAY)
+        if period not in self.activity_max_buckets:
+            raise ValidationError({"period": "Must be either hour or day."})
+        buckets = min(
+            get_int_param(request, "buckets", default=30, minimum=1),
+            self.activity_max_buckets[period],
+        )
+        book_id = self.get_book_id()
+        step = timedelta(hours=1) if period == BookActivity.HOUR else timedelta(days=1)
+        activity = BookActivity.objects.filter(
+            book_id=book_id,
+            period=period,
+            bucket__gte=activity_bucket(period) - step * (buckets - 1),
+        ).order_by("bucket")
+        data = BookActivitySerializer(activity, many=True).data
+        if not data:
+            self.check_book_exists(book_id)
+        return Response(data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """
+        Returns the precomputed books liked by readers who liked this book.
+        """
+        book_id = self.get_book_id()
+        similar_books = (
+            SimilarBook.objects.filter(book_id=book_id)
+            .select_related("similar_book")
+            .only("score", "similar_book__name", "similar_book__author_name")
+            .order_by("-score")
+        )
+        data = SimilarBookSerializer(similar_books, many=True).data
+        if not data:
+            # Only an empty result tells a book without pairs from a missing one.
+            self.check_book_exists(book_id)
+        return Response(data)
+
 
 class UserBookRelationalView(
+    QueryBudgetMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
@@ -40,9 +312,41 @@ class UserBookRelationalView(
     queryset = UserBookRelation.objects.all()
     serializer_class = UserBookRelationSerializer
     permission_classes = [IsAuthenticated]
+    query_budgets = {
+        # Creating a relation, a cold user cache and the savepoint guarding the
+        # first INSERT inside an enclosing transaction.
+        "partial_update": QueryBudget(queries=9, time_ms=100),
+    }
 
     def get_object(self):
-        obj, _ = UserBookRelation.objects.get_or_create(
-            user=self.request.user, book_id=self.kwargs["book"]
-        )
-        return obj
+        """
+        Returns the relation of the user with the book. A new relation is left
+        unsaved, so the first change is written by a single INSERT.
+        """
+        book_id = self.kwargs[self.lookup_field]
+        if not book_id.isdigit():
+            raise Http404
+        try:
+            return UserBookRelation.objects.get(user=self.request.user, book_id=book_id)
+        except UserBookRelation.DoesNotExist:
+            if not Book.objects.filter(pk=book_id).exists():
+                raise Http404
+            return UserBookRelation(user=self.request.user, book_id=int(book_id))
+
+    def perform_update(self, serializer):
+        """
+        Saves the relation. When a concurrent request creates the relation
+        first, the change is applied to that relation instead.
+        """
+        if serializer.instance.pk is not None:
+            serializer.save()
+            return
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # A concurrent first change created the relation: update that one.
+            serializer.instance = UserBookRelation.objects.get(
+                user=self.request.user, book_id=serializer.instance.book_id
+            )
+            serializer.save()